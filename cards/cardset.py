@@ -1,3 +1,8 @@
+from .declarations import declarations
+from .mask import card_index, cards_to_mask
+from .precedence import BEATS, NO_TRUMP, trump_index
+
+
 class CardSet:
     def __init__(self, cards=None, max_cards=32):
         self.max_number_of_cards = max_cards
@@ -26,6 +31,10 @@ class CardSet:
             new_cardset.add_card(card.to_ranked(suit))
         return new_cardset
 
+    @property
+    def mask(self):
+        return cards_to_mask(self.cards)
+
     @property
     def total_points(self):
         return sum([card.points for card in self.cards])
@@ -52,25 +61,68 @@ class Hand(CardSet):
     def __init__(self, cards=None):
         CardSet.__init__(self, cards, 8)
 
+    def declarations(self, trump_suit):
+        """(sequences and carrés points, belote points) held in this hand"""
+        return declarations(self.mask, trump_suit)
+
 
 class Trick(CardSet):
     """
     Four or less distinct cards.
 
-    If cards are ranked, this class is also able to find the winning card of
-    the trick.
+    The winning card is updated as cards are added, with a lookup in the
+    precedence tables (see cards.precedence). The trump suit is the one
+    given, or else the suit of the first trump card added (cards that are
+    not ranked are never trumps).
     """
 
-    def __init__(self, cards=None):
-        CardSet.__init__(self, cards, 4)
+    def __init__(self, cards=None, trump_suit=None):
+        CardSet.__init__(self, [], 4)
+        self.trump = trump_index(trump_suit)
+        self.winner_position = None
+        for card in cards or []:
+            self.add_card(card)
+
+    def add_card(self, card):
+        CardSet.add_card(self, card)
+        index = card_index(card)
+        if self.trump == NO_TRUMP and getattr(card, "is_trump", False) is True:
+            self.trump = index >> 3
+        if self.winner_position is None:
+            self.winner_position = 0
+            self.lead = index >> 3
+            self.winning_index = index
+        elif BEATS[self.trump][self.lead][index] >> self.winning_index & 1:
+            self.winner_position = len(self.cards) - 1
+            self.winning_index = index
+
+    def pop(self, index):
+        card = CardSet.pop(self, index)
+        self._update_winner()
+        return card
+
+    def remove(self, card):
+        CardSet.remove(self, card)
+        self._update_winner()
+
+    def _update_winner(self):
+        cards, self.cards, self.winner_position = self.cards, [], None
+        for card in cards:
+            self.add_card(card)
+
+    def to_ranked(self, suit):
+        trick = Trick(trump_suit=suit)
+        for card in self.cards:
+            trick.add_card(card.to_ranked(suit))
+        return trick
 
     @property
     def winner(self):
-        first_card = self.cards[0]
-        demanded_suit = first_card.suit
-        winner_card = first_card
-        for i, card in enumerate(self.cards[1:]):
-            if (card.is_trump or card.suit == demanded_suit) and \
-                    card.is_higher_than(winner_card):
-                winner_card = card
-        return winner_card
+        """Card currently winning the trick"""
+        return self.cards[self.winner_position]
+
+    @property
+    def winning_seat(self):
+        """Seat of the owner of the winning card, or None"""
+        owner = self.winner.owner
+        return getattr(owner, "seat", None)
@@ -0,0 +1,100 @@
+"""
+Declarations (annonces) of a hand, read from its card mask with
+precomputed tables.
+
+Each suit of a mask is one byte whose bits follow the order of sequences
+(7, 8, 9, 10, J, Q, K, A), so SEQUENCE_POINTS gives the points of all the
+sequences of a suit in one lookup. A value held in the four suits is a bit
+of the AND of the four bytes, and CARRE_POINTS gives the points of these
+carrés in one lookup. BEST_SEQUENCES and BEST_CARRES give the best
+declaration of a byte, to decide which team declares.
+"""
+from .mask import SUIT_INDEX, VALUE_INDEX
+
+BELOTE_POINTS = 20
+SEQUENCE_VALUES = {3: 20, 4: 50}  # tierce, cinquante; cent from five cards
+CENT = 100
+CARRE_VALUES = {"J": 200, "N": 150, "A": 100, "T": 100, "K": 100, "Q": 100}
+BELOTE_MASK = 1 << VALUE_INDEX["K"] | 1 << VALUE_INDEX["Q"]
+
+
+def _sequence_points(pattern):
+    points, run = 0, 0
+    for bit in range(9):
+        if bit < 8 and pattern >> bit & 1:
+            run += 1
+            continue
+        if run >= 5:
+            points += CENT
+        elif run in SEQUENCE_VALUES:
+            points += SEQUENCE_VALUES[run]
+        run = 0
+    return points
+
+
+def _carre_points(pattern):
+    return sum(points for value, points in CARRE_VALUES.items()
+               if pattern >> VALUE_INDEX[value] & 1)
+
+
+def _best_sequence(pattern):
+    """(points, highest bit) of the best sequence of a suit pattern"""
+    best, run = (0, -1), 0
+    for bit in range(9):
+        if bit < 8 and pattern >> bit & 1:
+            run += 1
+            continue
+        points = CENT if run >= 5 else SEQUENCE_VALUES.get(run, 0)
+        if points:
+            best = max(best, (points, bit - 1))
+        run = 0
+    return best
+
+
+def _best_carre(pattern):
+    """(points, rank) of the best carré of a pattern, ranks following CARRE_VALUES"""
+    return max(((points, len(CARRE_VALUES) - rank)
+                for rank, (value, points) in enumerate(CARRE_VALUES.items())
+                if pattern >> VALUE_INDEX[value] & 1), default=(0, -1))
+
+
+SEQUENCE_POINTS = [_sequence_points(pattern) for pattern in range(256)]
+CARRE_POINTS = [_carre_points(pattern) for pattern in range(256)]
+BEST_SEQUENCES = [_best_sequence(pattern) for pattern in range(256)]
+BEST_CARRES = [_best_carre(pattern) for pattern in range(256)]
+
+
+def declaration_points(mask):
+    """Points of the sequences and carrés of a hand mask"""
+    clubs, diamonds, hearts, spades = \
+        mask & 0xFF, mask >> 8 & 0xFF, mask >> 16 & 0xFF, mask >> 24 & 0xFF
+    return SEQUENCE_POINTS[clubs] + SEQUENCE_POINTS[diamonds] + \
+        SEQUENCE_POINTS[hearts] + SEQUENCE_POINTS[spades] + \
+        CARRE_POINTS[clubs & diamonds & hearts & spades]
+
+
+def best_declaration(mask):
+    """
+    (points, is a carré, rank) of the best sequence or carré of a hand mask,
+    (0, 0, -1) if there is none: declarations compare by points, then a
+    carré beats a sequence, then by rank (highest card of a sequence).
+    """
+    points, rank = BEST_CARRES[mask & mask >> 8 & mask >> 16 & mask >> 24 & 0xFF]
+    best = (points, 1, rank) if points else (0, 0, -1)
+    for suit in range(4):
+        points, rank = BEST_SEQUENCES[mask >> (8 * suit) & 0xFF]
+        if points:
+            best = max(best, (points, 0, rank))
+    return best
+
+
+def belote_points(mask, trump_index):
+    """Points of the belote (king and queen of trump) of a hand mask"""
+    if mask >> (8 * trump_index) & BELOTE_MASK == BELOTE_MASK:
+        return BELOTE_POINTS
+    return 0
+
+
+def declarations(mask, trump_suit):
+    """(sequences and carrés points, belote points) of a hand mask"""
+    return declaration_points(mask), belote_points(mask, SUIT_INDEX[trump_suit])
@@ -0,0 +1,78 @@
+"""
+Features of hands given as card masks (see cards.mask), read suit by suit
+from lookup tables indexed by the byte of the suit.
+
+hand_features(mask, trump) gives one row of FEATURES, hand_features(masks,
+trump) a list of rows. trump is a suit index. With played, the mask of the
+cards already played, masters counts the cards of the hand that no unplayed
+card of their suit can beat.
+"""
+from .mask import VALUE_INDEX, VALUES
+from .trump import NonTrump, Trump
+
+FEATURES = ("trumps", "trump_jack", "trump_nine", "side_aces", "side_tens",
+            "clubs", "diamonds", "hearts", "spades", "masters")
+
+JACK, NINE, ACE, TEN = VALUE_INDEX["J"], VALUE_INDEX["N"], VALUE_INDEX["A"], VALUE_INDEX["T"]
+POPCOUNT = [bin(pattern).count("1") for pattern in range(256)]
+# Bits of a suit byte from the strongest card to the weakest.
+TRUMP_ORDER = sorted(range(8), key=lambda bit: -Trump.trump_data[VALUES[bit]]["rank"])
+NON_TRUMP_ORDER = sorted(range(8), key=lambda bit: -NonTrump.non_trump_data[VALUES[bit]]["rank"])
+
+# SIDE[byte] = number of aces + 16 * number of tens of a side suit byte
+SIDE = [(pattern >> ACE & 1) | (pattern >> TEN & 1) << 4 for pattern in range(256)]
+
+_masters = None
+
+
+def _count_masters(hand, remaining, order):
+    masters = 0
+    for bit in order:
+        if remaining >> bit & 1:
+            if not hand >> bit & 1:
+                break
+            masters += 1
+    return masters
+
+
+def masters_table():
+    """MASTERS[is_trump << 16 | hand byte << 8 | unplayed byte], built on first use"""
+    global _masters
+    if _masters is None:
+        _masters = bytes(_count_masters(index >> 8 & 0xFF, index & 0xFF,
+                                        TRUMP_ORDER if index >> 16 else NON_TRUMP_ORDER)
+                         for index in range(1 << 17))
+    return _masters
+
+
+def _features(mask, trump, played, masters):
+    row = [0] * 10
+    side = 0
+    for suit in range(4):
+        pattern = mask >> (8 * suit) & 0xFF
+        row[5 + suit] = POPCOUNT[pattern]
+        unplayed = ~played >> (8 * suit) & 0xFF
+        if suit == trump:
+            row[0] = POPCOUNT[pattern]
+            row[1] = pattern >> JACK & 1
+            row[2] = pattern >> NINE & 1
+            row[9] += masters[1 << 16 | pattern << 8 | unplayed]
+        else:
+            side += SIDE[pattern]
+            row[9] += masters[pattern << 8 | unplayed]
+    row[3], row[4] = side & 0xF, side >> 4
+    return tuple(row)
+
+
+def hand_features(masks, trump, played=0):
+    """Row of FEATURES of a hand mask, or list of rows of a sequence of masks"""
+    masters = masters_table()
+    if isinstance(masks, int):
+        return _features(masks, trump, played, masters)
+    return [_features(mask, trump, played, masters) for mask in masks]
+
+
+def feature(rows, name):
+    """Column name of a list of rows"""
+    column = FEATURES.index(name)
+    return [row[column] for row in rows]
@@ -0,0 +1,55 @@
+"""
+Cards as bits of a 32-bit integer.
+
+Card of suit s and value v is bit 8 * s + v, suits and values being
+indexed in the order of Card.suit_names and Card.value_names. A set of
+cards is the OR of its bits, so that every suit occupies one byte.
+"""
+from .card import Card
+
+SUITS = list(Card.suit_names)
+VALUES = list(Card.value_names)
+SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+VALUE_INDEX = {value: i for i, value in enumerate(VALUES)}
+
+ALL_CARDS = (1 << 32) - 1
+SUIT_MASKS = [0xFF << (8 * i) for i in range(4)]
+
+
+def card_index(card):
+    return 8 * SUIT_INDEX[card.suit] + VALUE_INDEX[card.value]
+
+
+def card_mask(card):
+    return 1 << card_index(card)
+
+
+def card_from_index(index):
+    return Card(SUITS[index >> 3], VALUES[index & 7])
+
+
+def cards_to_mask(cards):
+    mask = 0
+    for card in cards:
+        mask |= card_mask(card)
+    return mask
+
+
+def indexes(mask):
+    """Indexes of the cards of mask, in increasing order"""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+def mask_to_cards(mask):
+    return [card_from_index(index) for index in indexes(mask)]
+
+
+def suit_mask(suit):
+    return SUIT_MASKS[SUIT_INDEX[suit]]
+
+
+def count(mask):
+    return bin(mask).count("1")
@@ -0,0 +1,42 @@
+"""
+Precedence of cards within a trick, as precomputed bit matrices.
+
+BEATS[trump][lead][card] is the mask (see cards.mask) of the cards that
+card beats when lead is the suit led, for trump in 0-3 (a suit index) or
+NO_TRUMP. Whether card beats winner is then a single bit test.
+"""
+from .mask import SUIT_INDEX, VALUES
+from .trump import NonTrump, Trump
+
+NO_TRUMP = 4
+
+
+def _rank(index, trump):
+    value = VALUES[index & 7]
+    if index >> 3 == trump:
+        return Trump.trump_data[value]["rank"]
+    return NonTrump.non_trump_data[value]["rank"]
+
+
+def _beats(card, other, trump, lead):
+    suit, other_suit = card >> 3, other >> 3
+    if suit != trump and suit != lead:
+        return False
+    if suit == trump and other_suit != trump:
+        return True
+    return suit == other_suit and _rank(card, trump) > _rank(other, trump)
+
+
+BEATS = [[[sum(1 << other for other in range(32) if _beats(card, other, trump, lead))
+           for card in range(32)]
+          for lead in range(4)]
+         for trump in range(NO_TRUMP + 1)]
+
+
+def beats(card, other, trump, lead):
+    """True if card index beats other when lead is led, trump being a suit index or NO_TRUMP"""
+    return BEATS[trump][lead][card] >> other & 1 == 1
+
+
+def trump_index(suit):
+    return NO_TRUMP if suit is None else SUIT_INDEX[suit]
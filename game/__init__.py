@@ -1,4 +1,5 @@
 from .commented_game import CommentedGame
 from .commented_round import CommentedRound
 from .game import Game
+from .history import TrickHistory
 from .round import Round
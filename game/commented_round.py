@@ -8,6 +8,11 @@ class CommentedRound(AbstractRound):
         self.commentator = RoundCommentator()
         self.commentator.comment_start_of_round(self.round)
 
+    def __getattr__(self, name):
+        if name == "round":
+            raise AttributeError(name)
+        return getattr(self.round, name)
+
     def play(self):
         for turn in range(8):
             trick = self.play_one_turn()
@@ -36,28 +41,28 @@ class CommentedRound(AbstractRound):
         self.commentator.comment_distribution(self.round)
 
     def get_other_team_by_id(self, team_id):
-        self.round.get_other_team_by_id(team_id)
+        return self.round.get_other_team_by_id(team_id)
 
     def set_starting_team_from_player(self, player):
         self.round.set_starting_team_from_player(player)
 
     def perform_first_distribution_and_reveal_card(self):
-        self.round.perform_first_distribution_and_reveal_card()
+        return self.round.perform_first_distribution_and_reveal_card()
 
     def second_round_calls(self, revealed_card):
-        self.round.second_round_calls(revealed_card)
+        return self.round.second_round_calls(revealed_card)
 
     def get_team_by_id(self, team_id):
-        self.round.get_team_by_id(team_id)
+        return self.round.get_team_by_id(team_id)
 
     def set_trump_suit(self, suit):
         self.round.set_trump_suit(suit)
 
     def who_plays_now(self, i):
-        self.round.who_plays_now(i)
+        return self.round.who_plays_now(i)
 
     def close(self):
         self.round.close()
 
     def first_round_calls(self, revealed_card):
-        self.round.first_round_calls(revealed_card)
\ No newline at end of file
+        return self.round.first_round_calls(revealed_card)
\ No newline at end of file
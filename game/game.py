@@ -7,33 +7,89 @@ from .round import Round
 
 class Game:
     def __init__(self, team1: Team, team2: Team, distributor: Distributor, referee: Referee,
-                 verbosity: int):
+                 verbosity: int, observers=None, seed=None):
         self.teams = [team1, team2]
         self.which_player_starts = 0
         self.distributor = distributor
         self.referee = referee
         self.number_of_games_played = 0
         self.verbosity = verbosity
+        self.observers = list(observers) if observers is not None else []
+        self.seed = seed
+        self.escrow = 0
 
     def play(self):
         while not self.is_finished():
-            round = self.new_round()
-            round.distribute_cards_and_choose_trump()
+            self.play_round()
+        self.finish()
+
+    def play_round(self):
+        round = self.new_round()
+        self.notify("round_started", round)
+        round.distribute_cards_and_choose_trump()
+        self.notify("round_dealt", round)
+        if round.played:
             round.play()
             round.count_points()
-            round.close()
-            self.number_of_games_played += 1
+        for observer in self.observers:
+            observer.round_played(self, round)
+        # Observers see the points of the round itself, escrow payout excluded
+        if round.played:
+            self.settle_escrow(round)
+        round.close()
+        self.number_of_games_played += 1
+
+    def notify(self, event, round):
+        """Calls the optional event(game, round) method of every observer"""
+        for observer in self.observers:
+            method = getattr(observer, event, None)
+            if method is not None:
+                method(self, round)
+
+    def settle_escrow(self, round):
+        """Points held in escrow go to the winner of the round, and those of a litige are held"""
+        winner = self.referee.winning_team(self.teams)
+        if self.escrow and winner is not None:
+            winner.current_game_points += self.escrow
+            winner.game_night_points += self.escrow
+            self.escrow = 0
+        self.escrow += round.escrow
+
+    def finish(self):
+        for observer in self.observers:
+            observer.game_played(self)
 
     def is_finished(self):
         return max([team.game_night_points for team in self.teams]) > 1000
 
+    def to_dict(self):
+        """State needed to resume the game between two rounds"""
+        return {"seed": self.seed,
+                "number_of_games_played": self.number_of_games_played,
+                "escrow": self.escrow,
+                "game_night_points": [team.game_night_points for team in self.teams]}
+
+    def restore(self, data):
+        self.seed = data["seed"]
+        self.number_of_games_played = data["number_of_games_played"]
+        self.escrow = data.get("escrow", 0)
+        for team, points in zip(self.teams, data["game_night_points"]):
+            team.game_night_points = points
+
+    def round_seed(self, round_id):
+        """Seed of a round, derived from the game seed so games can be replayed"""
+        if self.seed is None:
+            return None
+        return "{}:{}".format(self.seed, round_id)
+
     def new_round(self):
         deck = Deck()
         round = Round(self.number_of_games_played, self.teams[0],
                       self.teams[1], deck,
                       self.distributor,
                       self.referee,
-                      self.number_of_games_played % 4)
+                      self.number_of_games_played % 4,
+                      self.round_seed(self.number_of_games_played))
         if self.verbosity == 0:
             return round
         else:
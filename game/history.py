@@ -0,0 +1,69 @@
+from array import array
+
+from cards.mask import card_index
+
+
+class TrickHistory:
+    """
+    Plays of a round, in preallocated arrays: seats[4 * t + i] and
+    cards[4 * t + i] are the seat and the card index (see cards.mask) of
+    the i-th card of trick t, leaders[t] and winners[t] the seats that led
+    and won trick t. Unknown entries are -1. Every query is O(1).
+    """
+
+    def __init__(self):
+        self.seats = array("b", [-1] * 32)
+        self.cards = array("b", [-1] * 32)
+        self.leaders = array("b", [-1] * 8)
+        self.winners = array("b", [-1] * 8)
+        self.number_of_plays = 0
+        self.number_of_tricks = 0
+
+    def add_play(self, seat, card):
+        position = self.number_of_plays
+        if position % 4 == 0:
+            self.leaders[position // 4] = seat
+        self.seats[position] = seat
+        self.cards[position] = card_index(card)
+        self.number_of_plays += 1
+
+    def end_trick(self, winner):
+        self.winners[self.number_of_tricks] = winner
+        self.number_of_tricks += 1
+
+    @property
+    def current_trick(self):
+        """Number of the trick being played, or 8 once the round is over"""
+        return self.number_of_plays // 4
+
+    def play(self, trick, position):
+        """(seat, card index) of the position-th card of trick"""
+        return self.seats[4 * trick + position], self.cards[4 * trick + position]
+
+    def trick(self, trick):
+        """(seat, card index) plays of trick, in order"""
+        end = min(4 * trick + 4, self.number_of_plays)
+        return [(self.seats[i], self.cards[i]) for i in range(4 * trick, end)]
+
+    def leader(self, trick):
+        return self.leaders[trick]
+
+    def winner(self, trick):
+        return self.winners[trick]
+
+    @property
+    def last_winner(self):
+        """Seat that won the last completed trick, or None"""
+        if self.number_of_tricks == 0:
+            return None
+        return self.winners[self.number_of_tricks - 1]
+
+    def card_played_by(self, seat, trick):
+        """Index of the card seat played in trick, or -1"""
+        leader = self.leaders[trick]
+        if leader < 0:
+            return -1
+        return self.cards[4 * trick + (seat - leader) % 4]
+
+    def __len__(self):
+        return self.number_of_plays
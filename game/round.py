@@ -1,7 +1,10 @@
 from abc import abstractmethod
 
-from cards import Trick
+from cards import Hand, Trick
+from cards.declarations import best_declaration
 from players.team import Team
+from players.tracker import CardTracker
+from .history import TrickHistory
 
 
 class AbstractRound(object):
@@ -79,6 +82,15 @@ class Round(AbstractRound):
         self.played = True
         self.last_trick_winner = 0
         self.seed = seed
+        self.who_starts = who_starts
+        self.taker = None
+        self.calling_round = None
+        self.revealed_card = None
+        self.escrow = 0
+        self.tracker = CardTracker()
+        self.history = TrickHistory()
+        for seat, player in enumerate(self.players):
+            player.join_round(seat, self.tracker)
 
     def play(self):
         for turn in range(8):
@@ -90,10 +102,15 @@ class Round(AbstractRound):
         return 0
 
     def play_one_turn(self):
-        trick = Trick()
+        trick = Trick(trump_suit=self.trump_suit)
         for i in range(4):
             player = self.who_plays_now(i)
+            for other in self.players:
+                if other is not player:
+                    other.ponder(trick, player.seat)
             player.play(trick, self.trump_suit)
+            self.tracker.card_played(player.seat, trick[-1], trick)
+            self.history.add_play(player.seat, trick[-1])
         return trick
 
     def who_plays_now(self, i):
@@ -111,19 +128,23 @@ class Round(AbstractRound):
             self.distributor.distribute_remaining_cards_to_players(self.deck,
                                                                    self.players)
             self.set_trump_suit(trump_suit)
+            self.announce_declarations()
 
     def perform_first_distribution_and_reveal_card(self):
         self.distributor.shuffle(self.deck, self.seed)
         self.distributor.distribute_five_cards_to_players(self.deck,
                                                           self.players)
         revealed_card = self.distributor.reveal_next_card(self.deck)
+        self.revealed_card = revealed_card
         return revealed_card
 
     def first_round_calls(self, revealed_card):
         no_one_started = True
         for player in self.players:
             if player.chooses_to_start(revealed_card):
+                self.calling_round = 1
                 self.set_starting_team_from_player(player)
+                self.tracker.card_revealed(player.seat, revealed_card)
 
                 self.distributor.give_card_to_player(revealed_card, player)
                 no_one_started = False
@@ -134,15 +155,18 @@ class Round(AbstractRound):
         no_one_started = True
         trump_suit = None
         for player in self.players:
-            trump_suit = player.announce_trump_or_pass()
+            trump_suit = player.announce_trump_or_pass(revealed_card)
             if trump_suit is not None:
+                self.calling_round = 2
                 self.set_starting_team_from_player(player)
+                self.tracker.card_revealed(player.seat, revealed_card)
                 self.distributor.give_card_to_player(revealed_card, player)
                 no_one_started = False
                 break
         return no_one_started, trump_suit
 
     def set_starting_team_from_player(self, player):
+        self.taker = player
         starting_team = self.get_team_by_id(player.teamID)
         starting_team.has_started(True)
 
@@ -151,9 +175,28 @@ class Round(AbstractRound):
 
     def set_trump_suit(self, suit):
         self.trump_suit = suit
+        self.tracker.set_trump_suit(suit)
         for player in self.players:
             player.set_trump_suit(self.trump_suit)
 
+    def announce_declarations(self):
+        """
+        Gives each team its declarations. Only the team of the player with
+        the best sequence or carré (see best_declaration; on a tie, the
+        player who plays first) keeps its sequences and carrés; belotes are
+        always kept.
+        """
+        declaring_player = max(self.players,
+                               key=lambda player: (best_declaration(player.hand.mask), -player.seat))
+        if best_declaration(declaring_player.hand.mask)[0] == 0:
+            declaring_player = None
+        for team in self.teams:
+            declared = [player.hand.declarations(self.trump_suit)
+                        for player in (team.player1, team.player2)]
+            keeps = declaring_player is not None and declaring_player.teamID == team.id
+            team.set_declarations(sum(points for points, _ in declared) if keeps else 0,
+                                  sum(belote for _, belote in declared))
+
     def get_team_by_id(self, team_id):
         return [team for team in self.teams if team.id == team_id][0]
 
@@ -164,16 +207,21 @@ class Round(AbstractRound):
     def evaluate_turn(self, trick):
         winner_card = trick.winner
         winning_player = winner_card.owner
+        self.last_trick_winner = winning_player.seat
+        self.history.end_trick(winning_player.seat)
         winning_team = self.get_team_by_id(winning_player.teamID)
         return winning_team
 
     def count_points(self):
+        points, self.escrow = self.referee.score_round(self.teams)
         for team in self.teams:
-            points = self.referee.count_team_points(team)
-            team.set_game_points(points)
+            team.set_game_points(points[team])
 
     def close(self):
         for team in self.teams:
             team.throw_away_won_cards()
+        for player in self.players:
+            player.stop_pondering()
+            player.hand = Hand()
 
 
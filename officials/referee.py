@@ -1,16 +1,52 @@
+from .scoring import score_round
+
+
 class Referee:
     @staticmethod
-    def count_team_points(team):
+    def count_card_points(team):
         bonus = 10 if team.won_last_turn else 0
-        points = team.won_cards.total_points + bonus
+        return team.won_cards.total_points + bonus
+
+    @staticmethod
+    def count_team_points(team):
+        points = Referee.count_card_points(team)
         if team.started:
             return points if points >= 82 else 0
         else:
             return points if points <= 80 else 162
 
-    def winning_team(self, game):
-        which_team_started = game.which_team_started
-        if self.count_team_points(which_team_started) >= 82:
-            return which_team_started
-        else:
-            return game.which_team_didnt_start
\ No newline at end of file
+    def score_round(self, teams):
+        """
+        (points of each team, points held in escrow) of a round, with the
+        contract rules of officials.scoring.
+        """
+        team_0, team_1 = sorted(teams, key=lambda team: team.id)
+        if not (team_0.started or team_1.started):
+            return {team_0: 0, team_1: 0}, 0
+        score = score_round(0 if team_0.started else 1,
+                            (self.count_card_points(team_0), self.count_card_points(team_1)),
+                            self.count_tricks(team_0, team_1),
+                            (team_0.declaration_points, team_1.declaration_points),
+                            (team_0.belote_points, team_1.belote_points))
+        return {team_0: score.points[0], team_1: score.points[1]}, score.escrow
+
+    @staticmethod
+    def count_tricks(team, other_team):
+        """Tricks won by team, 8 or 0 only when a team won no card at all"""
+        if len(other_team.won_cards) == 0:
+            return 8
+        if len(team.won_cards) == 0:
+            return 0
+        return min(max(len(team.won_cards) // 4, 1), 7)
+
+    def count_round_points(self, teams):
+        """Points of each team, declarations included"""
+        return self.score_round(teams)[0]
+
+    @staticmethod
+    def winning_team(teams):
+        """Team that scored the most points in the last round, None on a tie"""
+        first, second = sorted(teams, key=lambda team: -team.current_game_points)
+        if first.current_game_points == second.current_game_points:
+            return None
+        return first
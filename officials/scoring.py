@@ -0,0 +1,98 @@
+"""
+Scoring of contracts, for one round or for columns of round outcomes.
+
+An outcome is given from the point of view of team 0: the taking team (0
+or 1), the card points won by each team (last trick bonus included), the
+number of tricks won by team 0, and the declaration and belote points of
+each team.
+
+- capot: a team winning the 8 tricks scores 252 card points instead of 162;
+- the taking team must score more than the defence, declarations and
+  belotes included;
+- dedans: if it scores less, the defence gets 162 (or 252 for a capot)
+  and every declaration;
+- litige: if it scores as much, the defence gets its points and those of
+  the taking team are held in escrow, for the team that wins the next
+  round;
+- belotes always stay with the team that holds them.
+"""
+from array import array
+from numbers import Integral
+
+ALL_POINTS = 162
+CAPOT_POINTS = 252
+
+
+class RoundScore:
+    def __init__(self, points, escrow=0):
+        self.points = points
+        self.escrow = escrow
+
+    @property
+    def litige(self):
+        return self.escrow > 0
+
+    def __eq__(self, other):
+        return (self.points, self.escrow) == (other.points, other.escrow)
+
+    def __repr__(self):
+        return "RoundScore({}, escrow={})".format(self.points, self.escrow)
+
+
+def _score(taker, cards_0, cards_1, tricks, declarations_0, declarations_1, belote_0, belote_1):
+    """(points of team 0, points of team 1, escrow) of one outcome"""
+    if tricks == 8:
+        cards_0, cards_1 = CAPOT_POINTS, 0
+    elif tricks == 0:
+        cards_0, cards_1 = 0, CAPOT_POINTS
+    total_0 = cards_0 + declarations_0 + belote_0
+    total_1 = cards_1 + declarations_1 + belote_1
+    if taker == 0:
+        taker_total, defence_total = total_0, total_1
+        taker_belote, defence_belote, defence_cards = belote_0, belote_1, cards_1
+    else:
+        taker_total, defence_total = total_1, total_0
+        taker_belote, defence_belote, defence_cards = belote_1, belote_0, cards_0
+    if taker_total > defence_total:
+        return total_0, total_1, 0
+    if taker_total == defence_total:
+        taker_points, defence_points = taker_belote, defence_total
+        escrow = taker_total - taker_belote
+    else:
+        taker_points, escrow = taker_belote, 0
+        defence_points = max(ALL_POINTS, defence_cards) + declarations_0 + \
+            declarations_1 + defence_belote
+    if taker == 0:
+        return taker_points, defence_points, escrow
+    return defence_points, taker_points, escrow
+
+
+def score_round(taker, card_points, tricks, declarations=(0, 0), belotes=(0, 0)):
+    """
+    RoundScore of one outcome, points being indexed by team id. card_points
+    are the card points of team 0, or of both teams as a pair.
+    """
+    if isinstance(card_points, Integral):
+        card_points = (card_points, ALL_POINTS - card_points)
+    points_0, points_1, escrow = _score(taker, card_points[0], card_points[1], tricks,
+                                        declarations[0], declarations[1],
+                                        belotes[0], belotes[1])
+    return RoundScore((points_0, points_1), escrow)
+
+
+def score_rounds(takers, card_points, tricks, declarations_0=None, declarations_1=None,
+                 belotes_0=None, belotes_1=None):
+    """
+    Scores N outcomes given as columns (lists, arrays or any sequences of
+    the same length), card_points being those of team 0, and returns the
+    points of team 0, the points of team 1 and the escrows as three arrays.
+    """
+    zeros = [0] * len(takers)
+    optional = [zeros if column is None else column
+                for column in (declarations_0, declarations_1, belotes_0, belotes_1)]
+    columns = zip(takers, card_points, [ALL_POINTS - points for points in card_points],
+                  tricks, *optional)
+    scores = [_score(*outcome) for outcome in columns]
+    return (array("i", [score[0] for score in scores]),
+            array("i", [score[1] for score in scores]),
+            array("i", [score[2] for score in scores]))
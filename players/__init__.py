@@ -1,2 +1,4 @@
 from .players import Player
+from .strategy_cache import MemoizedStrategy
 from .team import Team
+from .tracker import CardTracker
@@ -1,4 +1,5 @@
 from cards import Hand
+from cards.mask import ALL_CARDS
 
 
 class Player:
@@ -8,6 +9,9 @@ class Player:
         self.starting_strategy = starting_strategy
         self.playing_strategy = playing_strategy
         self.teamID = None
+        self.trump_suit = None
+        self.seat = None
+        self.tracker = None
 
     def play(self, trick, trump_suit):
         card = self.choose_card(trick, trump_suit)
@@ -15,22 +19,40 @@ class Player:
 
     def choose_card(self, trick, trump_suit):
         if len(trick) == 0:
-            return self.choose_card_from(self.hand)
+            return self.choose_card_from(self.hand, trick)
         else:
             demanded_suit = trick[0].suit
             demanded_cards_in_hand = self.get_demanded_suit_cards_in_hand(
                 demanded_suit)
             trump_cards_in_hand = self.get_trump_cards_in_hand(trump_suit)
             if len(demanded_cards_in_hand) > 0:
-                return self.choose_card_from(demanded_cards_in_hand)
+                return self.choose_card_from(demanded_cards_in_hand, trick)
             elif len(trump_cards_in_hand) > 0:
-                return self.choose_card_from(trump_cards_in_hand)
+                return self.choose_card_from(trump_cards_in_hand, trick)
             else:
-                return self.choose_card_from(self.hand)
-
-    @staticmethod
-    def choose_card_from(cards):
-        return cards[0]
+                return self.choose_card_from(self.hand, trick)
+
+    def choose_card_from(self, cards, trick):
+        """Picks one of the playable cards, using the playing strategy if any.
+
+        A playing strategy is called as strategy(player, cards, trick) and
+        must return one of cards."""
+        if self.playing_strategy is None:
+            return cards[0]
+        return self.playing_strategy(self, cards, trick)
+
+    def ponder(self, trick, seat):
+        """Called while seat is to play trick. A playing strategy with a
+        ponder(player, trick, seat) method may search in the background until
+        its stop_pondering(player) method is called."""
+        ponder = getattr(self.playing_strategy, "ponder", None)
+        if ponder is not None:
+            ponder(self, trick, seat)
+
+    def stop_pondering(self):
+        stop_pondering = getattr(self.playing_strategy, "stop_pondering", None)
+        if stop_pondering is not None:
+            stop_pondering(self)
 
     def get_trump_cards_in_hand(self, trump_suit):
         return self._get_cards_in_hand_with_suit(trump_suit)
@@ -53,15 +75,45 @@ class Player:
         trick.add_card(card)
 
     def chooses_to_start(self, card):
-        return True
+        """Takes the revealed card in the first round of calls, using the
+        starting strategy if any.
+
+        A starting strategy is called as strategy(player, card) and returns
+        True to take; if it has an announce(player, card) method, it names
+        a suit or returns None in the second round of calls."""
+        if self.starting_strategy is None:
+            return True
+        return self.starting_strategy(self, card)
+
+    def announce_trump_or_pass(self, card):
+        """Suit named in the second round of calls, or None to pass"""
+        announce = getattr(self.starting_strategy, "announce", None)
+        if announce is None:
+            return None
+        return announce(self, card)
 
     def add_card_to_hand(self, card):
         self.hand.add_card(card.with_owner(self))
 
+    def join_round(self, seat, tracker):
+        self.seat = seat
+        self.tracker = tracker
+
+    def possible_cards(self, seat):
+        """Mask of the cards seat may hold, as far as this player knows"""
+        if seat == self.seat:
+            return self.hand.mask
+        return self.tracker.possible[seat] & ~self.hand.mask
+
+    def unseen_cards(self):
+        """Mask of the cards neither played nor in this player's hand"""
+        return ALL_CARDS & ~self.tracker.played & ~self.hand.mask
+
     def set_team_id(self, id):
         self.teamID = id
 
     def set_trump_suit(self, suit):
+        self.trump_suit = suit
         self.hand = self.hand.to_ranked(suit)
 
     def __str__(self):
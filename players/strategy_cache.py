@@ -0,0 +1,104 @@
+from collections import OrderedDict
+
+from cards import Card
+from cards.mask import SUIT_INDEX, card_index
+
+
+def playing_key(player, cards, trick):
+    """
+    Hash of the information set of a card choice: seat, hand, every card
+    played by whom in order (so the voids shown too), cards known to be in
+    a hand (the revealed card), cards of the trick and trump suit. The
+    playable cards follow from these and are not part of the key.
+    """
+    tracker = player.tracker
+    history = tuple(tracker.history) if tracker is not None else ()
+    known = tuple(tracker.known) if tracker is not None else ()
+    trump = SUIT_INDEX.get(player.trump_suit, -1)
+    return hash((player.seat, player.hand.mask, history, known,
+                 tuple(card_index(card) for card in trick), trump))
+
+
+def starting_key(player, card):
+    """
+    Hash of the information set of a call: seat, hand and revealed card.
+    Only calls of the first round go through a memoized starting strategy
+    (announce is not cached), so the calling round is not part of the key.
+    """
+    return hash((player.seat, player.hand.mask, card_index(card)))
+
+
+class MemoizedStrategy:
+    """
+    Strategy wrapper that remembers the decisions of strategy for the
+    last capacity information sets it was asked about (least recently used
+    ones are evicted first).
+
+    key(player, *arguments) computes the information set hash: playing_key
+    for a playing strategy, starting_key for a starting strategy. Cards
+    chosen are stored as indexes and given back as the matching card of the
+    arguments. A strategy with a true stochastic attribute is called every
+    time, since the same information set may not lead to the same decision.
+    """
+
+    def __init__(self, strategy, capacity=4096, key=playing_key):
+        self.strategy = strategy
+        self.capacity = capacity
+        self.key = key
+        self.bypassed = getattr(strategy, "stochastic", False)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __call__(self, player, *arguments):
+        if self.bypassed:
+            return self.strategy(player, *arguments)
+        key = self.key(player, *arguments)
+        if key in self.entries:
+            decision = self.decode(self.entries[key], arguments)
+            if decision is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return decision
+        self.misses += 1
+        decision = self.strategy(player, *arguments)
+        self.entries[key] = self.encode(decision)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return decision
+
+    def __getattr__(self, name):
+        if name == "strategy":
+            raise AttributeError(name)
+        return getattr(self.strategy, name)
+
+    @staticmethod
+    def encode(decision):
+        if isinstance(decision, Card):
+            return True, card_index(decision)
+        return False, decision
+
+    @staticmethod
+    def decode(entry, arguments):
+        """Decision of entry, or None if it is not one of the cards offered"""
+        is_card, value = entry
+        if not is_card:
+            return value
+        for card in arguments[0]:
+            if card_index(card) == value:
+                return card
+        return None
+
+    @property
+    def hit_rate(self):
+        calls = self.hits + self.misses
+        return self.hits / calls if calls > 0 else None
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
@@ -12,6 +12,8 @@ class Team:
         self.won_cards = CardSet()
         self.current_game_points = 0
         self.game_night_points = 0
+        self.declaration_points = 0
+        self.belote_points = 0
 
     def has_started(self, boolean):
         self.started = boolean
@@ -27,12 +29,19 @@ class Team:
         self.player1.set_team_id(self.id)
         self.player2.set_team_id(self.id)
 
+    def set_declarations(self, declaration_points, belote_points):
+        self.declaration_points = declaration_points
+        self.belote_points = belote_points
+
     def set_game_points(self, points):
         self.current_game_points = points
         self.game_night_points += points
 
     def throw_away_won_cards(self):
         self.won_cards = CardSet()
+        self.won_last_turn = False
+        self.declaration_points = 0
+        self.belote_points = 0
 
     def __str__(self):
         return "Team " + str(self.id) + ": " + str(
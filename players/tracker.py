@@ -0,0 +1,60 @@
+from cards.mask import ALL_CARDS, SUIT_INDEX, SUIT_MASKS, card_index
+
+
+class CardTracker:
+    """
+    Public knowledge about the cards of a round.
+
+    For each seat, possible[seat] is the mask of the cards that seat may
+    still hold given everything seen at the table: played cards are
+    removed, the revealed card is removed from everyone but the taker, and
+    a player who does not follow the demanded suit (or does not trump when
+    he cannot follow) is void in that suit. history lists the (seat, card
+    index) plays in order. Every update is O(1).
+    """
+
+    def __init__(self, trump_suit=None):
+        self.trump_suit = trump_suit
+        self.possible = [ALL_CARDS] * 4
+        self.known = [0] * 4
+        self.played = 0
+        self.cards_left = [8] * 4
+        self.history = []
+
+    def set_trump_suit(self, suit):
+        self.trump_suit = suit
+
+    def card_revealed(self, seat, card):
+        """The revealed card went to seat, everyone saw it"""
+        mask = 1 << card_index(card)
+        self.known[seat] |= mask
+        for other_seat in range(4):
+            if other_seat != seat:
+                self.possible[other_seat] &= ~mask
+
+    def card_played(self, seat, card, trick):
+        """Seat just played card, which is the last card of trick"""
+        index = card_index(card)
+        mask = 1 << index
+        self.played |= mask
+        self.known[seat] &= ~mask
+        self.cards_left[seat] -= 1
+        self.history.append((seat, index))
+        for other_seat in range(4):
+            self.possible[other_seat] &= ~mask
+        if len(trick) > 1:
+            demanded_suit = trick[0].suit
+            if card.suit != demanded_suit:
+                self.set_void(seat, demanded_suit)
+                if self.trump_suit is not None and card.suit != self.trump_suit:
+                    self.set_void(seat, self.trump_suit)
+
+    def set_void(self, seat, suit):
+        self.possible[seat] &= ~SUIT_MASKS[SUIT_INDEX[suit]]
+
+    def is_void(self, seat, suit):
+        return self.possible[seat] & SUIT_MASKS[SUIT_INDEX[suit]] == 0
+
+    @property
+    def unplayed(self):
+        return ALL_CARDS & ~self.played
@@ -0,0 +1,7 @@
+from .distribution import SuitDistribution
+from .ismcts import ISMCTS, SearchTree
+from .parallel import ParallelDeterminizedSolver, ParallelSearch, SharedTranspositionTable
+from .sampler import DealSampler
+from .solver import Solver, TranspositionTable
+from .state import GameState
+from .tablebase import Tablebase
@@ -0,0 +1,172 @@
+"""
+Probabilities of how the unseen cards of a suit are split between the
+hidden hands, read from precomputed and cached tables.
+
+Without voids, if n unseen cards of a suit lie among hands of sizes h_1,
+..., h_m (total T), each hand holds k_i of them with probability
+prod(C(h_i, k_i)) / C(T, n): MARGINALS holds these hypergeometric
+probabilities for every hand of a Round. With voids, splits counts the
+deals of each split exactly, the other unseen cards being grouped by the
+seats that may hold them as in DealSampler; results are cached by suit
+count, hand sizes and groups, so a position seen again is a table read.
+"""
+from functools import lru_cache
+from math import comb, factorial
+
+from cards.mask import SUIT_MASKS, count, indexes
+from .sampler import allocations
+
+MAX_SUIT = 8
+MAX_TOTAL = 24
+
+
+def _marginal(unseen, size, total):
+    if unseen > total or size > total:
+        return ()
+    ways = comb(total, unseen)
+    return tuple(comb(size, k) * comb(total - size, unseen - k) / ways
+                 for k in range(unseen + 1))
+
+
+# MARGINALS[(unseen * (MAX_SUIT + 1) + size) * (MAX_TOTAL + 1) + total][k]: probability
+# that a hand of size cards holds k of the unseen cards of a suit, total
+# cards being hidden in the hands that may hold the suit.
+MARGINALS = [_marginal(unseen, size, total)
+             for unseen in range(MAX_SUIT + 1)
+             for size in range(MAX_SUIT + 1)
+             for total in range(MAX_TOTAL + 1)]
+
+
+def marginal(unseen, size, total):
+    """Probabilities that a hand of size cards holds 0, 1, ..., unseen cards of the suit"""
+    return MARGINALS[(unseen * (MAX_SUIT + 1) + size) * (MAX_TOTAL + 1) + total]
+
+
+def marginals(queries):
+    """marginal for every (unseen, size, total) of queries"""
+    return [MARGINALS[(unseen * (MAX_SUIT + 1) + size) * (MAX_TOTAL + 1) + total]
+            for unseen, size, total in queries]
+
+
+def _ways(number_of_cards, allocation, remaining):
+    """Ways of dealing distinct cards as allocation, and the room left"""
+    left = list(remaining)
+    ways = factorial(number_of_cards)
+    for seat, k in allocation:
+        left[seat] -= k
+        ways //= factorial(k)
+    return ways, tuple(left)
+
+
+@lru_cache(maxsize=None)
+def fill_count(groups, remaining):
+    """Ways of dealing the cards of groups, ((seats, number of cards), ...), to fill remaining exactly"""
+    if not groups:
+        return 0 if any(remaining) else 1
+    (seats, number_of_cards), other_groups = groups[0], groups[1:]
+    total = 0
+    for allocation in allocations(number_of_cards, seats, remaining):
+        ways, left = _ways(number_of_cards, allocation, remaining)
+        total += ways * fill_count(other_groups, left)
+    return total
+
+
+@lru_cache(maxsize=None)
+def splits(unseen, holders, hand_sizes, other_groups=None):
+    """
+    {counts of holders: probability} of the splits of the unseen cards of a
+    suit between the seats of holders, hand_sizes being the hidden hand
+    sizes by seat and other_groups the other unseen cards grouped by the
+    seats that may hold them (all the seats of holders if None).
+    """
+    if other_groups is None:
+        other_groups = ((holders, sum(hand_sizes[seat] for seat in holders) - unseen),)
+    weights = {}
+    for allocation in allocations(unseen, holders, hand_sizes):
+        ways, left = _ways(unseen, allocation, hand_sizes)
+        weight = ways * fill_count(other_groups, left)
+        if weight:
+            weights[tuple(k for _, k in allocation)] = weight
+    total = sum(weights.values())
+    return {split: weight / total for split, weight in weights.items()}
+
+
+class SuitDistribution:
+    """
+    Split probabilities from the point of view of a player, for its
+    CardTracker's current knowledge: unseen cards, hidden hand sizes and
+    voids. Known cards (the revealed card) are not part of the splits.
+    Call update after cards are played; set_void records a void learned
+    some other way.
+    """
+
+    def __init__(self, player):
+        self.player = player
+        self.voids = set()
+        self.update()
+
+    def update(self):
+        player, tracker = self.player, self.player.tracker
+        known = 0
+        for seat in range(4):
+            known |= tracker.known[seat] & ~tracker.played
+        self.unseen = player.unseen_cards() & ~known
+        self.hidden_seats = tuple(seat for seat in range(4) if seat != player.seat)
+        sizes = [0] * 4
+        for seat in self.hidden_seats:
+            sizes[seat] = tracker.cards_left[seat] - count(tracker.known[seat] & ~tracker.played)
+            for suit in range(4):
+                if not tracker.possible[seat] & SUIT_MASKS[suit] & self.unseen:
+                    self.voids.add((seat, suit))
+        self.sizes = tuple(sizes)
+
+    def set_void(self, seat, suit):
+        self.voids.add((seat, suit))
+
+    def unseen_in(self, suit):
+        return count(self.unseen & SUIT_MASKS[suit])
+
+    def holders(self, suit):
+        return tuple(seat for seat in self.hidden_seats if (seat, suit) not in self.voids)
+
+    def splits(self, suit):
+        """{counts of holders(suit): probability}"""
+        groups = {}
+        for index in indexes(self.unseen & ~SUIT_MASKS[suit]):
+            seats = self.holders(index >> 3)
+            groups[seats] = groups.get(seats, 0) + 1
+        return splits(self.unseen_in(suit), self.holders(suit), self.sizes,
+                      tuple(sorted(groups.items())))
+
+    def count_probabilities(self, suit, seat):
+        """Probabilities that seat holds 0, 1, ... of the unseen cards of suit"""
+        probabilities = [0.] * (self.unseen_in(suit) + 1)
+        holders = self.holders(suit)
+        if seat not in holders:
+            probabilities[0] = 1.
+            return probabilities
+        position = holders.index(seat)
+        for split, probability in self.splits(suit).items():
+            probabilities[split[position]] += probability
+        return probabilities
+
+    def split_probability(self, suit, counts):
+        """Probability that each seat of counts holds exactly counts[seat] cards of suit"""
+        holders = self.holders(suit)
+        if any(k and seat not in holders for seat, k in counts.items()):
+            return 0.
+        return sum(probability for split, probability in self.splits(suit).items()
+                   if all(split[holders.index(seat)] == k
+                          for seat, k in counts.items() if seat in holders))
+
+    def card_probability(self, card, seat):
+        """Probability that seat holds the card of index card"""
+        tracker = self.player.tracker
+        if tracker.known[seat] >> card & 1 and not tracker.played >> card & 1:
+            return 1.
+        suit = card >> 3
+        if not self.unseen >> card & 1 or seat not in self.holders(suit):
+            return 0.
+        expected = sum(k * probability
+                       for k, probability in enumerate(self.count_probabilities(suit, seat)))
+        return expected / self.unseen_in(suit)
@@ -0,0 +1,243 @@
+import math
+import random
+import threading
+import time
+import weakref
+from array import array
+
+from cards.mask import SUIT_INDEX, card_index, indexes
+from .sampler import DealSampler
+from .state import GameState
+
+MAX_ROUND_POINTS = 162
+
+
+class SearchTree:
+    """
+    Nodes of a search tree stored in preallocated parallel arrays.
+
+    Children of a node form a linked list through first_child and
+    next_sibling. Once capacity nodes are allocated, no more are added.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.parent = array("i", [-1]) * capacity
+        self.first_child = array("i", [-1]) * capacity
+        self.next_sibling = array("i", [-1]) * capacity
+        self.move = array("b", [-1]) * capacity
+        self.seat = array("b", [-1]) * capacity
+        self.visits = array("i", [0]) * capacity
+        self.availability = array("i", [0]) * capacity
+        self.reward = array("d", [0.]) * capacity
+        self.size = 0
+
+    @property
+    def is_full(self):
+        return self.size >= self.capacity
+
+    def clear(self):
+        self.size = 0
+
+    def add_node(self, parent, move, seat):
+        """Adds the node reached from parent when seat plays move"""
+        node = self.size
+        self.size += 1
+        self.parent[node] = parent
+        self.first_child[node] = -1
+        self.move[node] = move
+        self.seat[node] = seat
+        self.visits[node] = 0
+        self.availability[node] = 0
+        self.reward[node] = 0.
+        if parent != -1:
+            self.next_sibling[node] = self.first_child[parent]
+            self.first_child[parent] = node
+        else:
+            self.next_sibling[node] = -1
+        return node
+
+    def children(self, node):
+        child = self.first_child[node]
+        while child != -1:
+            yield child
+            child = self.next_sibling[child]
+
+    def find_child(self, node, move):
+        for child in self.children(node):
+            if self.move[child] == move:
+                return child
+        return -1
+
+
+class ISMCTS:
+    """
+    Single-observer information set Monte Carlo tree search, usable as a
+    Player's playing strategy.
+
+    Each iteration samples a deal consistent with what the player knows
+    (see DealSampler), descends the tree with UCB restricted to the moves
+    legal in that deal, expands one node and finishes the round at random.
+    Since nodes are information sets rather than deals, the search does
+    not suffer from strategy fusion.
+
+    Every player using the strategy gets its own tree, which is kept
+    between its decisions within a round: the subtree reached by the cards
+    played in between becomes the new root. A full tree is still searched,
+    without new nodes, until the cards played leave it. Trees are dropped
+    with their players.
+
+    With pondering, the search goes on in a background thread while the
+    other seats are to play (see Player.ponder), from the position they
+    are to play in, and stops once its root has iterations visits. Each
+    background search draws from its own generator, seeded from the
+    strategy's in the main thread. The
+    tree being keyed by the cards actually played, what was searched below
+    them is reused, and a decision only runs the iterations its root still
+    lacks.
+
+    Args:
+      iterations: maximum number of iterations per decision
+      time_budget: maximum number of seconds per decision, if any
+      exploration: UCB exploration constant
+      capacity: maximum number of nodes of each tree
+      pondering: whether to search while the other seats are to play
+    """
+
+    stochastic = True
+
+    def __init__(self, iterations=1000, time_budget=None, exploration=0.7,
+                 capacity=100000, seed=None, pondering=False):
+        self.iterations = iterations
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.capacity = capacity
+        self.random = random.Random(seed)
+        self.searches = weakref.WeakKeyDictionary()
+        self.pondering = pondering
+        self.ponderings = {}
+
+    def __call__(self, player, cards, trick):
+        self.stop_pondering(player)
+        if len(cards) == 1:
+            return cards[0]
+        tree, root = self.find_root(player)
+        self.search(player, tree, root, trick)
+        legal = {card_index(card): card for card in cards}
+        best = max((child for child in tree.children(root) if tree.move[child] in legal),
+                   key=lambda child: tree.visits[child], default=-1)
+        return legal[tree.move[best]] if best != -1 else cards[0]
+
+    def find_root(self, player):
+        """Tree of player, rooted at the current information set"""
+        tracker = player.tracker
+        tree, previous_tracker, root, history_length = self.searches.get(
+            player, (None, None, -1, 0))
+        if tree is None:
+            tree = SearchTree(self.capacity)
+        if previous_tracker is tracker:
+            for _, move in tracker.history[history_length:]:
+                root = tree.find_child(root, move)
+                if root == -1:
+                    break
+        else:
+            root = -1
+        if root == -1:
+            tree.clear()
+            root = tree.add_node(-1, -1, -1)
+        self.searches[player] = (tree, tracker, root, len(tracker.history))
+        return tree, root
+
+    def search(self, player, tree, root, trick):
+        sampler = DealSampler.from_player(player, seed=self.random.random())
+        trump = SUIT_INDEX[player.trump_suit]
+        plays = [(card.owner.seat, card_index(card)) for card in trick]
+        leader = plays[0][0] if plays else player.seat
+        deadline = None if self.time_budget is None else time.monotonic() + self.time_budget
+        iterations = self.iterations - tree.visits[root] if self.pondering else self.iterations
+        for iteration in range(iterations):
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            state = GameState(sampler.sample_one(), trump, leader, plays)
+            self.iterate(tree, root, state)
+
+    def ponder(self, player, trick, seat):
+        """Searches in the background from the position where seat is to play trick"""
+        self.stop_pondering(player)
+        if not self.pondering or len(player.hand) == 0:
+            return
+        tree, root = self.find_root(player)
+        sampler = DealSampler.from_player(player, seed=self.random.random())
+        rng = random.Random(self.random.random())
+        trump = SUIT_INDEX[player.trump_suit]
+        plays = [(card.owner.seat, card_index(card)) for card in trick]
+        leader = plays[0][0] if plays else seat
+        stop = threading.Event()
+        thread = threading.Thread(target=self.search_until_stopped, daemon=True,
+                                  args=(tree, root, sampler, rng, trump, leader, plays, stop))
+        self.ponderings[player] = thread, stop
+        thread.start()
+
+    def search_until_stopped(self, tree, root, sampler, rng, trump, leader, plays, stop):
+        while not stop.is_set() and tree.visits[root] < self.iterations and not tree.is_full:
+            self.iterate(tree, root, GameState(sampler.sample_one(), trump, leader, plays), rng)
+
+    def stop_pondering(self, player):
+        """Stops the background search of player, if any, and waits for it"""
+        thread, stop = self.ponderings.pop(player, (None, None))
+        if thread is not None:
+            stop.set()
+            thread.join()
+
+    def iterate(self, tree, root, state, rng=None):
+        """One iteration from root, drawing from rng (the strategy's own generator if None)"""
+        rng = self.random if rng is None else rng
+        path = [root]
+        node = root
+        while not state.is_over:
+            legal = state.legal_moves_mask()
+            compatible = []
+            tried = 0
+            child = tree.first_child[node]
+            while child != -1:
+                move = tree.move[child]
+                if legal >> move & 1:
+                    compatible.append(child)
+                    tried |= 1 << move
+                child = tree.next_sibling[child]
+            untried = legal & ~tried
+            if untried:
+                if not tree.is_full:
+                    move = rng.choice(list(indexes(untried)))
+                    node = tree.add_node(node, move, state.player_to_move)
+                    path.append(node)
+                    state.play(move)
+                break
+            node = self.select(tree, compatible)
+            path.append(node)
+            state.play(tree.move[node])
+        self.rollout(state, rng)
+        self.backpropagate(tree, path, state)
+
+    def select(self, tree, compatible):
+        best, best_score = -1, -1.
+        for child in compatible:
+            tree.availability[child] += 1
+            visits = tree.visits[child]
+            score = tree.reward[child] / visits + self.exploration * math.sqrt(
+                math.log(tree.availability[child]) / visits)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def rollout(self, state, rng=None):
+        choice = (self.random if rng is None else rng).choice
+        while not state.is_over:
+            state.play(choice(list(indexes(state.legal_moves_mask()))))
+
+    @staticmethod
+    def backpropagate(tree, path, state):
+        tree.visits[path[0]] += 1
+        for node in path[1:]:
+            tree.visits[node] += 1
+            tree.reward[node] += state.points[tree.seat[node] & 1] / MAX_ROUND_POINTS
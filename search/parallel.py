@@ -0,0 +1,168 @@
+"""
+Process-parallel search: the moves of a root position, or the deals
+sampled for a decision, are spread over a pool of worker processes that
+share one transposition table.
+"""
+import random
+from multiprocessing import Pool, shared_memory
+
+from cards.mask import SUIT_INDEX, card_index, count
+from .sampler import DealSampler
+from .solver import Solver
+from .state import GameState
+
+MASK_64 = (1 << 64) - 1
+
+
+def mix(value):
+    """splitmix64 finalizer"""
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & MASK_64
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & MASK_64
+    return value ^ (value >> 31)
+
+
+def position_hash(key):
+    hands, leader, trump = key
+    value = leader << 2 | trump
+    for hand in hands:
+        value = mix(value ^ hand)
+    return value or 1
+
+
+class SharedTranspositionTable:
+    """
+    Transposition table in shared memory, usable by Solver from several
+    processes at once.
+
+    Each slot holds two 64-bit words: the entry data (bounds and depth)
+    and the position hash XOR-ed with the data. Writers never lock; a
+    reader accepts an entry only if both words agree, so that torn writes
+    read as misses. An entry replaces the one in its slot unless that one
+    was computed for a deeper position.
+    """
+
+    def __init__(self, capacity=1 << 20, name=None):
+        self.capacity = capacity
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=16 * capacity)
+            self.memory.buf[:16 * capacity] = bytes(16 * capacity)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.slots = self.memory.buf.cast("Q")
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def get(self, key):
+        slot = 2 * (position_hash(key) % self.capacity)
+        data, check = self.slots[slot], self.slots[slot + 1]
+        if data == 0 or check ^ data != position_hash(key):
+            return None
+        lower, upper = data >> 40 & 0xFFFF, data >> 24 & 0xFFFF
+        return lower - 0x8000, upper - 0x8000
+
+    def put(self, key, lower, upper):
+        hashed = position_hash(key)
+        slot = 2 * (hashed % self.capacity)
+        depth = sum(count(hand) for hand in key[0])
+        current = self.slots[slot]
+        if current != 0 and current & 0xFF > depth and \
+                self.slots[slot + 1] ^ current != hashed:
+            return
+        data = (lower + 0x8000) << 40 | (upper + 0x8000) << 24 | 1 << 8 | depth
+        self.slots[slot] = data
+        self.slots[slot + 1] = hashed ^ data
+
+    def close(self):
+        self.slots.release()
+        self.memory.close()
+
+    def unlink(self):
+        self.memory.unlink()
+
+
+_worker_table = None
+
+
+def _attach_table(name, capacity):
+    global _worker_table
+    _worker_table = SharedTranspositionTable(capacity, name=name)
+
+
+def _evaluate_state(state):
+    return Solver(table=_worker_table).evaluate_moves(state)
+
+
+def _evaluate_move(arguments):
+    state, move = arguments
+    return move, Solver(table=_worker_table).evaluate_move(state, move)
+
+
+class ParallelSearch:
+    """
+    Pool of solver processes sharing a SharedTranspositionTable.
+
+    evaluate_moves spreads the legal moves of one double-dummy position
+    over the workers; evaluate_deals spreads determinizations of a
+    decision, one deal per task.
+    """
+
+    def __init__(self, processes=None, capacity=1 << 20):
+        self.table = SharedTranspositionTable(capacity)
+        self.pool = Pool(processes, initializer=_attach_table,
+                         initargs=(self.table.name, capacity))
+
+    def evaluate_moves(self, state):
+        """Points won by the team to move after each legal move"""
+        tasks = [(state, move) for move in state.legal_moves()]
+        return dict(self.pool.map(_evaluate_move, tasks, chunksize=1))
+
+    def evaluate_deals(self, states):
+        """Mean points won by the team to move after each move, over states"""
+        totals = {}
+        for values in self.pool.imap_unordered(_evaluate_state, states):
+            for move, value in values.items():
+                totals[move] = totals.get(move, 0) + value
+        return {move: total / len(states) for move, total in totals.items()}
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        self.table.close()
+        self.table.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ParallelDeterminizedSolver:
+    """
+    Playing strategy that samples deals consistent with what the player
+    knows, solves each of them double-dummy on a ParallelSearch, and plays
+    the move with the best mean value.
+    """
+
+    stochastic = True
+
+    def __init__(self, search, samples=32, seed=None):
+        self.search = search
+        self.samples = samples
+        self.random = random.Random(seed)
+
+    def __call__(self, player, cards, trick):
+        if len(cards) == 1:
+            return cards[0]
+        sampler = DealSampler.from_player(player, seed=self.random.random())
+        trump = SUIT_INDEX[player.trump_suit]
+        plays = [(card.owner.seat, card_index(card)) for card in trick]
+        leader = plays[0][0] if plays else player.seat
+        states = [GameState(hands, trump, leader, plays)
+                  for hands in sampler.sample(self.samples)]
+        values = self.search.evaluate_deals(states)
+        legal = {card_index(card): card for card in cards}
+        best = max(legal, key=lambda move: values.get(move, -1))
+        return legal[best]
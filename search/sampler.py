@@ -0,0 +1,124 @@
+import bisect
+import random
+from math import factorial
+
+from cards.mask import count, indexes
+
+
+def allocations(number_of_cards, seats, remaining):
+    """All ways of splitting number_of_cards between seats, within remaining room"""
+    if not seats:
+        if number_of_cards == 0:
+            yield ()
+        return
+    seat, other_seats = seats[0], seats[1:]
+    for k in range(min(number_of_cards, remaining[seat]) + 1):
+        for rest in allocations(number_of_cards - k, other_seats, remaining):
+            yield ((seat, k),) + rest
+
+
+class DealSampler:
+    """
+    Uniform sampler of the deals consistent with what a player knows.
+
+    Unseen cards are grouped by the set of seats that may hold them (voids
+    make those sets differ from one suit to another). The number of
+    consistent deals is counted over the allocations of each group to its
+    seats, and deals are drawn group by group with probabilities
+    proportional to those counts: every sample is valid, no rejection is
+    ever needed, and all consistent deals are equally likely.
+
+    Args:
+      possible: for each seat, the mask of unseen cards it may hold
+      hand_sizes: for each seat, the number of unseen cards it holds
+      fixed: for each seat, the mask of cards known to be in its hand
+    """
+
+    def __init__(self, possible, hand_sizes, fixed=None, seed=None):
+        self.fixed = tuple(fixed) if fixed is not None else (0, 0, 0, 0)
+        self.hand_sizes = tuple(hand_sizes)
+        self.random = random.Random(seed)
+        groups = {}
+        unseen = 0
+        for seat in range(4):
+            unseen |= possible[seat]
+        for index in indexes(unseen):
+            seats = tuple(seat for seat in range(4) if possible[seat] >> index & 1)
+            groups.setdefault(seats, []).append(index)
+        if sum(len(cards) for cards in groups.values()) != sum(self.hand_sizes):
+            raise ValueError("Hand sizes do not match the number of unseen cards")
+        self.groups = sorted(groups.items())
+        self._counts = {}
+        self._choices = {}
+        if self.count() == 0:
+            raise ValueError("No deal is consistent with the constraints")
+
+    def count(self, group=0, remaining=None):
+        """Number of deals of groups[group:] filling exactly the remaining room"""
+        remaining = self.hand_sizes if remaining is None else remaining
+        if group == len(self.groups):
+            return 1 if not any(remaining) else 0
+        key = (group, remaining)
+        if key not in self._counts:
+            self._counts[key] = sum(weight for weight, _ in
+                                    self._weighted_allocations(group, remaining))
+        return self._counts[key]
+
+    def _weighted_allocations(self, group, remaining):
+        seats, cards = self.groups[group]
+        for allocation in allocations(len(cards), seats, remaining):
+            rest = list(remaining)
+            ways = factorial(len(cards))
+            for seat, k in allocation:
+                rest[seat] -= k
+                ways //= factorial(k)
+            weight = ways * self.count(group + 1, tuple(rest))
+            if weight > 0:
+                yield weight, (allocation, tuple(rest))
+
+    def _choice_table(self, group, remaining):
+        key = (group, remaining)
+        if key not in self._choices:
+            cumulative_weights, choices, total = [], [], 0
+            for weight, choice in self._weighted_allocations(group, remaining):
+                total += weight
+                cumulative_weights.append(total)
+                choices.append(choice)
+            self._choices[key] = (cumulative_weights, choices)
+        return self._choices[key]
+
+    def sample_one(self):
+        hands = list(self.fixed)
+        remaining = self.hand_sizes
+        for group, (_, cards) in enumerate(self.groups):
+            cumulative_weights, choices = self._choice_table(group, remaining)
+            draw = self.random.randrange(cumulative_weights[-1])
+            allocation, remaining = choices[bisect.bisect_right(cumulative_weights, draw)]
+            shuffled = self.random.sample(cards, len(cards))
+            start = 0
+            for seat, k in allocation:
+                for index in shuffled[start:start + k]:
+                    hands[seat] |= 1 << index
+                start += k
+        return tuple(hands)
+
+    def sample(self, number_of_samples):
+        """Returns number_of_samples deals, each a tuple of four hand masks"""
+        return [self.sample_one() for _ in range(number_of_samples)]
+
+    @classmethod
+    def from_player(cls, player, seed=None):
+        """Sampler of the hidden hands, from the point of view of player"""
+        tracker = player.tracker
+        possible, hand_sizes, fixed = [0] * 4, [0] * 4, [0] * 4
+        known = 0
+        for seat in range(4):
+            fixed[seat] = tracker.known[seat] & ~tracker.played
+            known |= fixed[seat]
+        fixed[player.seat] = player.hand.mask
+        unseen = player.unseen_cards() & ~known
+        for seat in range(4):
+            if seat != player.seat:
+                possible[seat] = player.possible_cards(seat) & unseen
+                hand_sizes[seat] = tracker.cards_left[seat] - count(fixed[seat])
+        return cls(possible, hand_sizes, fixed, seed)
@@ -0,0 +1,119 @@
+from .state import LAST_TRICK_BONUS, POINTS, STRENGTH
+
+INFINITY = 1000
+
+
+class TranspositionTable:
+    """Bounds on the value of positions at trick boundaries, in a dict"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, lower, upper):
+        self.entries[key] = (lower, upper)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def remaining_points(state):
+    points = POINTS[state.trump]
+    total = LAST_TRICK_BONUS
+    for hand in state.hands:
+        while hand:
+            lowest = hand & -hand
+            total += points[lowest.bit_length() - 1]
+            hand ^= lowest
+    return total + sum(points[card] for _, card in state.trick)
+
+
+class Solver:
+    """
+    Double-dummy solver: alpha-beta search of a round whose four hands are
+    known.
+
+    Values are the points team 0 (seats 0 and 2) still wins from the given
+    state, last trick bonus included. Positions at trick boundaries are
+    cached in the transposition table and, when a tablebase covers the
+    number of tricks left, read from it instead of being searched.
+    """
+
+    def __init__(self, table=None, tablebase=None):
+        self.table = table if table is not None else TranspositionTable()
+        self.tablebase = tablebase
+        self.nodes = 0
+
+    def solve(self, state):
+        return self.search(state, -INFINITY, INFINITY)
+
+    def evaluate_moves(self, state):
+        """Points won from state on by the team to move, for each legal move"""
+        return {move: self.evaluate_move(state, move) for move in state.legal_moves()}
+
+    def evaluate_move(self, state, move):
+        """Points won from state on by the team to move, if it plays move"""
+        child = state.copy()
+        before = child.points[0]
+        child.play(move)
+        value = child.points[0] - before + self.solve(child)
+        if state.player_to_move & 1:
+            value = remaining_points(state) - value
+        return value
+
+    def search(self, state, alpha, beta):
+        self.nodes += 1
+        if state.tricks_left == 0:
+            return 0
+        key = None
+        if not state.trick:
+            if self.tablebase is not None and state.tricks_left <= self.tablebase.tricks:
+                value = self.tablebase.lookup_state(state)
+                if value is not None:
+                    return value
+            key = (tuple(state.hands), state.leader, state.trump)
+            entry = self.table.get(key)
+            if entry is not None:
+                lower, upper = entry
+                if lower >= beta or lower == upper:
+                    return lower
+                if upper <= alpha:
+                    return upper
+                alpha, beta = max(alpha, lower), min(beta, upper)
+        original_alpha, original_beta = alpha, beta
+        maximizing = state.player_to_move & 1 == 0
+        best = -INFINITY if maximizing else INFINITY
+        for move in self.ordered_moves(state):
+            child = state.copy()
+            before = child.points[0]
+            child.play(move)
+            gained = child.points[0] - before
+            value = gained + self.search(child, alpha - gained, beta - gained)
+            if maximizing:
+                if value > best:
+                    best = value
+                alpha = max(alpha, best)
+            else:
+                if value < best:
+                    best = value
+                beta = min(beta, best)
+            if alpha >= beta:
+                break
+        if key is not None:
+            lower, upper = -INFINITY, INFINITY
+            if best <= original_alpha:
+                upper = best
+            elif best >= original_beta:
+                lower = best
+            else:
+                lower = upper = best
+            self.table.put(key, lower, upper)
+        return best
+
+    @staticmethod
+    def ordered_moves(state):
+        """Legal moves, strongest first, so that cutoffs come early"""
+        strength = STRENGTH[state.trump]
+        return sorted(state.legal_moves(), key=lambda card: -strength[card])
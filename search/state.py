@@ -0,0 +1,100 @@
+"""
+Compact state of a round in play, for search.
+
+Hands are card masks (see cards.mask), seats are the indexes of
+Round.players, and seats 0 and 2 play together against seats 1 and 3.
+Legal moves follow the same rules as Player.choose_card.
+"""
+from cards.mask import SUIT_MASKS, VALUES, indexes
+from cards.precedence import BEATS
+from cards.trump import NonTrump, Trump
+
+LAST_TRICK_BONUS = 10
+
+# STRENGTH[trump][card]: order of the cards that can win a trick, trumps
+# above every other card. POINTS[trump][card]: points of the card.
+STRENGTH = [[0] * 32 for _ in range(4)]
+POINTS = [[0] * 32 for _ in range(4)]
+for _trump in range(4):
+    for _index in range(32):
+        _value = VALUES[_index & 7]
+        if _index >> 3 == _trump:
+            STRENGTH[_trump][_index] = 8 + Trump.trump_data[_value]["rank"]
+            POINTS[_trump][_index] = Trump.trump_data[_value]["points"]
+        else:
+            STRENGTH[_trump][_index] = NonTrump.non_trump_data[_value]["rank"]
+            POINTS[_trump][_index] = NonTrump.non_trump_data[_value]["points"]
+
+
+def trick_winner(trick, trump):
+    """Index in trick of the winning play, trick being a list of (seat, card)"""
+    beats = BEATS[trump][trick[0][1] >> 3]
+    best, winning = 0, trick[0][1]
+    for i in range(1, len(trick)):
+        card = trick[i][1]
+        if beats[card] >> winning & 1:
+            best, winning = i, card
+    return best
+
+
+class GameState:
+    __slots__ = ("hands", "trump", "leader", "trick", "points", "tricks_left")
+
+    def __init__(self, hands, trump, leader, trick=None, points=None, tricks_left=None):
+        self.hands = list(hands)
+        self.trump = trump
+        self.leader = leader
+        self.trick = list(trick) if trick is not None else []
+        self.points = list(points) if points is not None else [0, 0]
+        if tricks_left is None:
+            tricks_left = bin(self.hands[self.player_to_move]).count("1")
+        self.tricks_left = tricks_left
+
+    def copy(self):
+        state = GameState.__new__(GameState)
+        state.hands = self.hands[:]
+        state.trump = self.trump
+        state.leader = self.leader
+        state.trick = self.trick[:]
+        state.points = self.points[:]
+        state.tricks_left = self.tricks_left
+        return state
+
+    @property
+    def player_to_move(self):
+        return (self.leader + len(self.trick)) & 3
+
+    @property
+    def is_over(self):
+        return self.tricks_left == 0
+
+    def legal_moves_mask(self):
+        hand = self.hands[(self.leader + len(self.trick)) & 3]
+        if not self.trick:
+            return hand
+        following = hand & SUIT_MASKS[self.trick[0][1] >> 3]
+        if following:
+            return following
+        trumps = hand & SUIT_MASKS[self.trump]
+        return trumps if trumps else hand
+
+    def legal_moves(self):
+        return list(indexes(self.legal_moves_mask()))
+
+    def play(self, card):
+        seat = (self.leader + len(self.trick)) & 3
+        self.hands[seat] &= ~(1 << card)
+        self.trick.append((seat, card))
+        if len(self.trick) == 4:
+            self.end_trick()
+
+    def end_trick(self):
+        winner = self.trick[trick_winner(self.trick, self.trump)][0]
+        points = POINTS[self.trump]
+        trick_points = sum(points[card] for _, card in self.trick)
+        self.tricks_left -= 1
+        if self.tricks_left == 0:
+            trick_points += LAST_TRICK_BONUS
+        self.points[winner & 1] += trick_points
+        self.leader = winner
+        self.trick = []
@@ -0,0 +1,171 @@
+"""
+Endgame tablebase: values of the positions of the last tricks of a round,
+solved once and for all and read back from a memory-mapped file.
+
+Positions are taken at trick boundaries and canonicalized: seats are
+rotated so that the leader sits first, the trump suit becomes the first
+suit and the three other suits are ordered so that the four hand masks
+are as small as possible. Values are the points the leader's team wins
+until the end of the round, last trick bonus included.
+
+The file holds a header followed by fixed-size records (128-bit key, 8-bit
+value) sorted by key, and lookups are binary searches in the mapping.
+"""
+import itertools
+import mmap
+import os
+import struct
+import tempfile
+from multiprocessing import Pool
+
+from cards.mask import count, indexes
+from .solver import Solver, remaining_points
+from .state import GameState
+
+MAGIC = b"BTB1"
+HEADER = struct.Struct(">4sBQ")
+KEY_SIZE = 16
+RECORD_SIZE = KEY_SIZE + 1
+
+
+def remap_suits(hand, order):
+    """Hand where suit i is the former suit order[i]"""
+    remapped = 0
+    for new_suit, old_suit in enumerate(order):
+        remapped |= (hand >> (8 * old_suit) & 0xFF) << (8 * new_suit)
+    return remapped
+
+
+def canonical_hands(hands, leader, trump):
+    rotated = [hands[(leader + i) & 3] for i in range(4)]
+    side_suits = [suit for suit in range(4) if suit != trump]
+    return min(tuple(remap_suits(hand, (trump,) + order) for hand in rotated)
+               for order in itertools.permutations(side_suits))
+
+
+def encode_key(hands):
+    key = 0
+    for hand in hands:
+        key = key << 32 | hand
+    return key.to_bytes(KEY_SIZE, "big")
+
+
+def solve_position(hands):
+    """Points won by the leader's team from a canonical position"""
+    return Solver().solve(GameState(hands, trump=0, leader=0))
+
+
+def solve_chunk(chunk):
+    return [(hands, solve_position(hands)) for hands in chunk]
+
+
+def enumerate_positions(tricks, cards):
+    """
+    All canonical positions, as (hands, leader, trump), where the four hands
+    hold `tricks` cards each, taken from the cards of the mask `cards`. The
+    number of positions grows very fast with the number of cards: restrict
+    `cards` to what can still be in play.
+    """
+    all_cards = list(indexes(cards))
+    if len(all_cards) != 4 * tricks:
+        raise ValueError("cards must hold exactly 4 * tricks cards")
+    seen = set()
+
+    def deals(remaining, seat):
+        if seat == 3:
+            yield (sum(1 << card for card in remaining),)
+            return
+        for hand in itertools.combinations(remaining, tricks):
+            rest = [card for card in remaining if card not in hand]
+            for others in deals(rest, seat + 1):
+                yield (sum(1 << card for card in hand),) + others
+
+    for hands in deals(all_cards, 0):
+        position = canonical_hands(hands, 0, 0)
+        if position not in seen:
+            seen.add(position)
+            yield position, 0, 0
+
+
+def generate(path, positions, processes=None, chunk_size=256):
+    """
+    Solves positions, given as (hands, leader, trump), and writes the table
+    at path. Positions are solved in parallel by processes workers.
+    """
+    unique = {canonical_hands(hands, leader, trump) for hands, leader, trump in positions}
+    tricks = {count(hands[0]) for hands in unique}
+    if len(tricks) > 1:
+        raise ValueError("All positions must have the same number of tricks left")
+    ordered = sorted(unique)
+    chunks = [ordered[i:i + chunk_size] for i in range(0, len(ordered), chunk_size)]
+    results = {}
+    if processes == 1:
+        for chunk in map(solve_chunk, chunks):
+            results.update(chunk)
+    else:
+        with Pool(processes) as pool:
+            for chunk in pool.imap_unordered(solve_chunk, chunks):
+                results.update(chunk)
+    write_table(path, tricks.pop() if tricks else 0, results)
+    return len(results)
+
+
+def write_table(path, tricks, values):
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".tablebase-")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(HEADER.pack(MAGIC, tricks, len(values)))
+            for hands in sorted(values):
+                f.write(encode_key(hands) + bytes([values[hands]]))
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+class Tablebase:
+    """Read-only, memory-mapped endgame tablebase"""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.tricks, self.size = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError("{} is not a tablebase".format(path))
+
+    def lookup(self, hands, leader, trump):
+        """Points won by the leader's team, or None if the position is not in the table"""
+        key = encode_key(canonical_hands(hands, leader, trump))
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * RECORD_SIZE
+            record_key = self.data[offset:offset + KEY_SIZE]
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle
+            else:
+                return self.data[offset + KEY_SIZE]
+        return None
+
+    def lookup_state(self, state):
+        """Points won by team 0 from a state at a trick boundary, or None"""
+        value = self.lookup(state.hands, state.leader, state.trump)
+        if value is None or state.leader & 1 == 0:
+            return value
+        return remaining_points(state) - value
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,12 @@
+from .bidding import BiddingSimulator, TrumpStrengthPolicy
+from .cfr import BiddingPolicy, BiddingSolver
+from .duplicate import DuplicateMatch, DuplicateResult
+from .experience import ExperienceBuffer, ExperienceRecorder
+from .match import Ladder, Match, SequentialTest
+from .memory import MemoryMonitor, memory_report
+from .opponents import OpponentObserver, OpponentStore
+from .recorder import RoundRecorder, read_records
+from .runner import Simulation
+from .shard_cache import ShardCache
+from .statistics import Histogram, RunningStatistic, Statistics
+from .watchdog import Watchdog
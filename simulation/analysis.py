@@ -0,0 +1,147 @@
+"""
+Offline analysis of recorded rounds (see simulation.recorder): every card
+played is annotated with the points it cost compared with the best legal
+card.
+
+Values are double-dummy values, or, with samples > 0, mean double-dummy
+values over deals sampled from what the player knew when playing. Rounds
+are analysed in parallel, one round per task, and each worker keeps the
+values of the positions it has already solved, so that positions seen
+again (duplicate deals, replays) are not solved twice.
+
+    python -m simulation.analysis rounds.jsonl annotated.jsonl --tricks 4
+"""
+import argparse
+import json
+from multiprocessing import Pool
+
+from cards import Hand, Trick
+from cards.mask import SUITS, card_from_index, mask_to_cards
+from players import CardTracker, Player
+from search.sampler import DealSampler
+from search.solver import Solver
+from search.state import GameState
+from search.tablebase import Tablebase
+from .recorder import read_records
+
+CACHE_SIZE = 1 << 16
+
+_worker_tablebase = None
+_worker_cache = {}
+
+
+def _open_tablebase(path):
+    global _worker_tablebase
+    _worker_tablebase = Tablebase(path) if path is not None else None
+
+
+def decision_points(record):
+    """Yields (state, tracker) before each play of record, then plays it"""
+    trump = record["trump"]
+    state = GameState(record["hands"], trump, 0)
+    tracker = CardTracker(SUITS[trump])
+    tracker.card_revealed(record["taker"], card_from_index(record["revealed"]))
+    trick = Trick(trump_suit=SUITS[trump])
+    for seat, card in record["plays"]:
+        if seat != state.player_to_move:
+            raise ValueError("Round {} is not a valid round".format(record["id"]))
+        yield state, tracker
+        state.play(card)
+        if len(trick) == 4:
+            trick = Trick(trump_suit=SUITS[trump])
+        trick.add_card(card_from_index(card))
+        tracker.card_played(seat, trick[-1], trick)
+
+
+def double_dummy_values(state, solver):
+    key = (tuple(state.hands), state.leader, state.trump, tuple(state.trick))
+    values = _worker_cache.get(key)
+    if values is None:
+        if len(_worker_cache) >= CACHE_SIZE:
+            _worker_cache.clear()
+        values = _worker_cache[key] = solver.evaluate_moves(state)
+    return values
+
+
+def sampled_values(state, tracker, solver, samples, seed):
+    seat = state.player_to_move
+    player = Player()
+    player.hand = Hand(mask_to_cards(state.hands[seat]))
+    player.join_round(seat, tracker)
+    totals = {}
+    for hands in DealSampler.from_player(player, seed).sample(samples):
+        sampled = GameState(hands, state.trump, state.leader, state.trick,
+                            tricks_left=state.tricks_left)
+        for move, value in solver.evaluate_moves(sampled).items():
+            totals[move] = totals.get(move, 0) + value
+    return {move: total / samples for move, total in totals.items()}
+
+
+def analyse_round(task):
+    """
+    Annotations of the plays of a record: {"value", "best", "regret"} for
+    the points won from then on by the team to move, or None for a play
+    not analysed (forced, or more than max_tricks tricks left).
+    """
+    record, samples, max_tricks, seed = task
+    solver = Solver(tablebase=_worker_tablebase)
+    decisions = []
+    for position, (state, tracker) in enumerate(decision_points(record)):
+        legal = state.legal_moves_mask()
+        if state.tricks_left > max_tricks or legal & (legal - 1) == 0:
+            decisions.append(None)
+            continue
+        if samples > 0:
+            values = sampled_values(state, tracker, solver, samples,
+                                    "{}:{}".format(seed, position))
+        else:
+            values = double_dummy_values(state, solver)
+        value = values[record["plays"][position][1]]
+        best = max(values.values())
+        decisions.append({"value": value, "best": best, "regret": best - value})
+    return decisions
+
+
+def analyse(input_path, output_path, processes=None, samples=0, max_tricks=8,
+            tablebase=None, seed=0):
+    """
+    Writes every record of input_path, with its "decisions" annotations,
+    to output_path, and returns the number of decisions analysed and their
+    total regret.
+    """
+    records = list(read_records(input_path))
+    tasks = [(record, samples, max_tricks, "{}:{}".format(seed, i))
+             for i, record in enumerate(records)]
+    analysed, total_regret = 0, 0.
+    with Pool(processes, initializer=_open_tablebase, initargs=(tablebase,)) as pool, \
+            open(output_path, "w") as output:
+        for record, decisions in zip(records, pool.imap(analyse_round, tasks, chunksize=4)):
+            record["decisions"] = decisions
+            output.write(json.dumps(record) + "\n")
+            for decision in decisions:
+                if decision is not None:
+                    analysed += 1
+                    total_regret += decision["regret"]
+    return analysed, total_regret
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Per-move regret of recorded rounds")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--samples", type=int, default=0,
+                        help="deals sampled per decision, 0 for double-dummy values")
+    parser.add_argument("--tricks", type=int, default=8,
+                        help="only analyse decisions with at most this many tricks left")
+    parser.add_argument("--tablebase", default=None)
+    parser.add_argument("--seed", default=0)
+    options = parser.parse_args(arguments)
+    analysed, total_regret = analyse(options.input, options.output, options.processes,
+                                     options.samples, options.tricks, options.tablebase,
+                                     options.seed)
+    print("{} decisions analysed, {:.1f} points of regret".format(analysed, total_regret))
+
+
+if __name__ == '__main__':
+    main()
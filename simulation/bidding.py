@@ -0,0 +1,196 @@
+"""
+Bidding-only simulation: deals and the two rounds of trump calls, without
+building Players, Teams or Rounds.
+
+Deals are identical to those of a Round with the same seed: the deck order
+and the distribution (two cards, three cards, revealed card, remaining
+cards) are reproduced on card indexes (see cards.mask).
+"""
+import random
+
+from cards.features import hand_features
+from cards.mask import SUIT_MASKS, VALUE_INDEX, count
+from search.solver import Solver
+from search.state import GameState
+from .statistics import RunningStatistic
+
+JACK, NINE, ACE = VALUE_INDEX["J"], VALUE_INDEX["N"], VALUE_INDEX["A"]
+
+
+def deal(seed):
+    """Hands of five cards and revealed card, as a Round with that seed deals them"""
+    deck = list(range(32))
+    random.Random(seed).shuffle(deck)
+    hands = [0] * 4
+    position = 0
+    for n in (2, 3):
+        for seat in range(4):
+            for card in deck[position:position + n]:
+                hands[seat] |= 1 << card
+            position += n
+    return hands, deck[position], deck[position + 1:]
+
+
+def complete_hands(hands, revealed, remaining, taker):
+    """Eight-card hands once the taker has the revealed card and the rest is dealt"""
+    hands = list(hands)
+    hands[taker] |= 1 << revealed
+    position = 0
+    for seat in range(4):
+        n = 2 if seat == taker else 3
+        for card in remaining[position:position + n]:
+            hands[seat] |= 1 << card
+        position += n
+    return hands
+
+
+def hand_class(hand, trump):
+    """(number of trumps, holds trump jack, holds trump nine, side aces)"""
+    trumps, jack, nine, side_aces = hand_features(hand, trump)[:4]
+    return trumps, bool(jack), bool(nine), side_aces
+
+
+class AlwaysTakePolicy:
+    """What Player does: the first player offered the revealed card takes it"""
+
+    def first_round(self, seat, hand, revealed):
+        return True
+
+    def second_round(self, seat, hand, revealed):
+        return None
+
+
+class TrumpStrengthPolicy:
+    """Takes when trumps, counting the revealed card, are worth enough"""
+
+    weights = {JACK: 5, NINE: 4, ACE: 2, VALUE_INDEX["T"]: 1}
+
+    def __init__(self, threshold=7):
+        self.threshold = threshold
+
+    def strength(self, hand, trump):
+        trumps = (hand & SUIT_MASKS[trump]) >> (8 * trump)
+        return count(trumps) + sum(weight for value, weight in self.weights.items()
+                                   if trumps >> value & 1)
+
+    def first_round(self, seat, hand, revealed):
+        return self.strength(hand | 1 << revealed, revealed >> 3) >= self.threshold
+
+    def second_round(self, seat, hand, revealed):
+        candidates = [suit for suit in range(4) if suit != revealed >> 3]
+        best = max(candidates, key=lambda suit: self.strength(hand | 1 << revealed, suit))
+        if self.strength(hand | 1 << revealed, best) >= self.threshold:
+            return best
+        return None
+
+
+class Contract:
+    def __init__(self, taker, trump, calling_round, hands):
+        self.taker = taker
+        self.trump = trump
+        self.calling_round = calling_round
+        self.hands = hands
+
+
+def calls(hands, revealed, policy):
+    """Taker seat, trump suit index and calling round (1 or 2), or None if all pass"""
+    for seat in range(4):
+        if policy.first_round(seat, hands[seat], revealed):
+            return seat, revealed >> 3, 1
+    for seat in range(4):
+        trump = policy.second_round(seat, hands[seat], revealed)
+        if trump is not None:
+            return seat, trump, 2
+    return None
+
+
+def playout_evaluator(playouts=8, seed=None):
+    """Mean points of the taker's team over random playouts of the contract"""
+    rng = random.Random(seed)
+
+    def evaluate(contract):
+        total = 0
+        for _ in range(playouts):
+            state = GameState(contract.hands, contract.trump, 0)
+            while not state.is_over:
+                moves = state.legal_moves()
+                state.play(moves[rng.randrange(len(moves))])
+            total += state.points[contract.taker & 1]
+        return total / playouts
+
+    return evaluate
+
+
+def solver_evaluator(solver_factory=None):
+    """Double-dummy points of the taker's team"""
+    solver_factory = solver_factory or Solver
+
+    def evaluate(contract):
+        points = solver_factory().solve(GameState(contract.hands, contract.trump, 0))
+        return points if contract.taker & 1 == 0 else 162 - points
+
+    return evaluate
+
+
+class ClassStatistics:
+    def __init__(self):
+        self.offered = 0
+        self.taken = {}
+        self.values = RunningStatistic()
+
+
+class BiddingSimulator:
+    """
+    Runs deals and calls only, and aggregates, for every hand class, how
+    often the hand was offered the revealed card, who took (seat, calling
+    round, trump suit) and, with an evaluator, the value of the contracts
+    taken.
+
+    Hand classes are computed on the five-card hand plus the revealed card,
+    with the revealed suit as trump (see hand_class).
+    """
+
+    def __init__(self, policy=None, evaluator=None, classifier=hand_class):
+        self.policy = policy or AlwaysTakePolicy()
+        self.evaluator = evaluator
+        self.classifier = classifier
+        self.classes = {}
+        self.deals = 0
+        self.passed = 0
+
+    def run(self, number_of_deals, seed=0):
+        for deal_id in range(self.deals, self.deals + number_of_deals):
+            self.simulate("{}:{}".format(seed, deal_id))
+        return self
+
+    def simulate(self, seed):
+        hands, revealed, remaining = deal(seed)
+        self.deals += 1
+        revealed_suit = revealed >> 3
+        hand_classes = [self.classifier(hand | 1 << revealed, revealed_suit) for hand in hands]
+        for hand_class in hand_classes:
+            self.class_statistics(hand_class).offered += 1
+        contract = calls(hands, revealed, self.policy)
+        if contract is None:
+            self.passed += 1
+            return None
+        taker, trump, calling_round = contract
+        statistics = self.class_statistics(hand_classes[taker])
+        key = (taker, calling_round, trump)
+        statistics.taken[key] = statistics.taken.get(key, 0) + 1
+        contract = Contract(taker, trump, calling_round,
+                            complete_hands(hands, revealed, remaining, taker))
+        if self.evaluator is not None:
+            statistics.values.add(self.evaluator(contract))
+        return contract
+
+    def class_statistics(self, hand_class):
+        if hand_class not in self.classes:
+            self.classes[hand_class] = ClassStatistics()
+        return self.classes[hand_class]
+
+    def take_rate(self, hand_class):
+        statistics = self.classes.get(hand_class)
+        if statistics is None or statistics.offered == 0:
+            return None
+        return sum(statistics.taken.values()) / statistics.offered
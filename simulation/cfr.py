@@ -0,0 +1,203 @@
+"""
+Counterfactual regret minimization (CFR+) of the calls, over abstracted
+hands.
+
+The calls are played as in Round: in the first round, seats 0 to 3 take
+the revealed card or pass; in the second round, they name a trump suit or
+pass. In this abstraction, a seat that names a suit names the best one for
+its hand, so every decision is take or pass. The decision only depends on
+the information set (calling round, seat, bucket of the hand): being asked
+means everyone before has passed. Buckets group hands by number of trumps,
+trump jack, trump nine and side aces, the revealed card counting in the
+hand.
+
+Contract values come from an evaluator of simulation.bidding, on deals
+sampled once. Values are the points difference between the two teams once
+the contract is scored (see officials.scoring), and 0 when everyone passes.
+"""
+from array import array
+
+from cards.features import hand_features
+from cards.mask import SUITS, card_index
+from officials.scoring import score_round
+from .bidding import Contract, TrumpStrengthPolicy, complete_hands, deal, playout_evaluator
+
+NUMBER_OF_BUCKETS = 6 * 2 * 2 * 3
+NUMBER_OF_INFORMATION_SETS = 8 * NUMBER_OF_BUCKETS
+NUMBER_OF_NODES = 8
+
+_strength = TrumpStrengthPolicy().strength
+
+
+def bucket(hand, trump):
+    """Bucket of a hand mask, the revealed card included, for a trump suit index"""
+    trumps, jack, nine, side_aces = hand_features(hand, trump)[:4]
+    return ((min(trumps, 5) * 2 + jack) * 2 + nine) * 3 + min(side_aces, 2)
+
+
+def best_suit(hand, revealed_suit):
+    """Suit index named in the second round of calls"""
+    return max((suit for suit in range(4) if suit != revealed_suit),
+               key=lambda suit: _strength(hand, suit))
+
+
+def information_set(calling_round, seat, hand_bucket):
+    return ((calling_round - 1) * 4 + seat) * NUMBER_OF_BUCKETS + hand_bucket
+
+
+def contract_value(points, taker):
+    """Points of team 0 minus points of team 1, the taker's team making points"""
+    score = score_round(0, int(round(points)), 4)
+    difference = score.points[0] - score.points[1]
+    return difference if taker & 1 == 0 else -difference
+
+
+class AbstractDeal:
+    """
+    Information sets and contract values of the 8 decisions of a deal:
+    node k is seat k % 4 in calling round k // 4 + 1.
+    """
+
+    def __init__(self, seed, evaluator):
+        hands, revealed, remaining = deal(seed)
+        revealed_suit = revealed >> 3
+        self.information_sets = []
+        self.values = []
+        for node in range(NUMBER_OF_NODES):
+            seat, calling_round = node % 4, node // 4 + 1
+            hand = hands[seat] | 1 << revealed
+            trump = revealed_suit if calling_round == 1 else best_suit(hand, revealed_suit)
+            self.information_sets.append(information_set(calling_round, seat, bucket(hand, trump)))
+            contract = Contract(seat, trump, calling_round,
+                                complete_hands(hands, revealed, remaining, seat))
+            self.values.append(contract_value(evaluator(contract), seat))
+
+
+class BiddingSolver:
+    """
+    CFR+ over a fixed sample of abstracted deals. Each iteration sweeps all
+    the deals with the current strategy, then adds the regrets, floored at
+    0, and the strategy weighted by the iteration number to the average
+    strategy.
+    """
+
+    def __init__(self, evaluator=None, seed=0):
+        self.evaluator = evaluator or playout_evaluator(4, seed)
+        self.seed = seed
+        self.deals = []
+        self.regrets = array("d", [0.] * 2 * NUMBER_OF_INFORMATION_SETS)
+        self.strategy_sums = array("d", [0.] * NUMBER_OF_INFORMATION_SETS)
+        self.weight_sums = array("d", [0.] * NUMBER_OF_INFORMATION_SETS)
+        self.iterations = 0
+
+    def add_deals(self, number_of_deals):
+        start = len(self.deals)
+        for deal_id in range(start, start + number_of_deals):
+            self.deals.append(AbstractDeal("{}:{}".format(self.seed, deal_id), self.evaluator))
+        return self
+
+    def current_strategy(self):
+        """Probability of taking of every information set, by regret matching"""
+        strategy = array("d", [0.5] * NUMBER_OF_INFORMATION_SETS)
+        regrets = self.regrets
+        for i in range(NUMBER_OF_INFORMATION_SETS):
+            total = regrets[2 * i] + regrets[2 * i + 1]
+            if total > 0:
+                strategy[i] = regrets[2 * i] / total
+        return strategy
+
+    def iterate(self):
+        strategy = self.current_strategy()
+        deltas = [0.] * 2 * NUMBER_OF_INFORMATION_SETS
+        reaches = [0.] * NUMBER_OF_INFORMATION_SETS
+        for abstract_deal in self.deals:
+            sets, values = abstract_deal.information_sets, abstract_deal.values
+            take = [strategy[i] for i in sets]
+            # node_values[k]: value for team 0 of reaching node k
+            node_values = [0.] * (NUMBER_OF_NODES + 1)
+            for k in range(NUMBER_OF_NODES - 1, -1, -1):
+                node_values[k] = take[k] * values[k] + (1 - take[k]) * node_values[k + 1]
+            own_reach, others_reach = [1.] * 4, [1.] * 4
+            for k in range(NUMBER_OF_NODES):
+                seat, i = k % 4, sets[k]
+                sign = 1 if seat & 1 == 0 else -1
+                counterfactual = others_reach[seat]
+                deltas[2 * i] += counterfactual * sign * (values[k] - node_values[k])
+                deltas[2 * i + 1] += counterfactual * sign * (node_values[k + 1] - node_values[k])
+                reaches[i] += own_reach[seat]
+                self.strategy_sums[i] += (self.iterations + 1) * own_reach[seat] * take[k]
+                own_reach[seat] *= 1 - take[k]
+                for other in range(4):
+                    if other != seat:
+                        others_reach[other] *= 1 - take[k]
+        for i in range(NUMBER_OF_INFORMATION_SETS):
+            self.regrets[2 * i] = max(0., self.regrets[2 * i] + deltas[2 * i])
+            self.regrets[2 * i + 1] = max(0., self.regrets[2 * i + 1] + deltas[2 * i + 1])
+            self.weight_sums[i] += (self.iterations + 1) * reaches[i]
+        self.iterations += 1
+
+    def solve(self, iterations):
+        for _ in range(iterations):
+            self.iterate()
+        return self.policy()
+
+    def average_strategy(self):
+        return [self.strategy_sums[i] / self.weight_sums[i] if self.weight_sums[i] > 0 else 0.5
+                for i in range(NUMBER_OF_INFORMATION_SETS)]
+
+    def policy(self):
+        return BiddingPolicy.from_probabilities(self.average_strategy())
+
+
+class BiddingPolicy:
+    """
+    Probability of taking of every information set, quantized to one byte.
+
+    Usable by BiddingSimulator (first_round and second_round on masks) and
+    as the starting strategy of a Player (called with the revealed card,
+    announce for the second round). Without rng, a hand takes when its
+    probability is at least one half; with rng, the policy is stochastic.
+    """
+
+    def __init__(self, table, rng=None):
+        if len(table) != NUMBER_OF_INFORMATION_SETS:
+            raise ValueError("A bidding policy needs {} entries".format(NUMBER_OF_INFORMATION_SETS))
+        self.table = bytes(table)
+        self.rng = rng
+        self.stochastic = rng is not None
+
+    @classmethod
+    def from_probabilities(cls, probabilities, rng=None):
+        return cls(bytes(int(round(255 * probability)) for probability in probabilities), rng)
+
+    def probability(self, calling_round, seat, hand, trump):
+        return self.table[information_set(calling_round, seat, bucket(hand, trump))] / 255
+
+    def takes(self, probability):
+        if self.rng is None:
+            return probability >= 0.5
+        return self.rng.random() < probability
+
+    def first_round(self, seat, hand, revealed):
+        return self.takes(self.probability(1, seat, hand | 1 << revealed, revealed >> 3))
+
+    def second_round(self, seat, hand, revealed):
+        hand |= 1 << revealed
+        suit = best_suit(hand, revealed >> 3)
+        return suit if self.takes(self.probability(2, seat, hand, suit)) else None
+
+    def __call__(self, player, card):
+        return self.first_round(player.seat, player.hand.mask, card_index(card))
+
+    def announce(self, player, card):
+        suit = self.second_round(player.seat, player.hand.mask, card_index(card))
+        return None if suit is None else SUITS[suit]
+
+    def save(self, path):
+        with open(path, "wb") as policy_file:
+            policy_file.write(self.table)
+
+    @classmethod
+    def load(cls, path, rng=None):
+        with open(path, "rb") as policy_file:
+            return cls(policy_file.read(), rng)
@@ -0,0 +1,108 @@
+import random
+
+from cards import Deck
+from game import Round
+from officials import Distributor, Referee
+from players import Player, Team
+from .statistics import RunningStatistic
+
+
+def play_round(round):
+    """Plays a whole round and returns the points of each team, by team id"""
+    round.distribute_cards_and_choose_trump()
+    points = {team.id: 0 for team in round.teams}
+    if round.played:
+        round.play()
+        round.count_points()
+        points = {team.id: team.current_game_points for team in round.teams}
+    round.close()
+    return points
+
+
+class DuplicateDeal:
+    """Both plays of a shuffled deck, from the point of view of strategy A"""
+
+    def __init__(self, points_a_first, points_b_first, points_a_second, points_b_second):
+        self.points_a_first = points_a_first
+        self.points_b_first = points_b_first
+        self.points_a_second = points_a_second
+        self.points_b_second = points_b_second
+
+    @property
+    def round_differences(self):
+        return (self.points_a_first - self.points_b_first,
+                self.points_a_second - self.points_b_second)
+
+    @property
+    def difference(self):
+        """Mean advantage of A over B when both sat in the same seats"""
+        return sum(self.round_differences) / 2
+
+
+class DuplicateResult:
+    def __init__(self):
+        self.deals = RunningStatistic()
+        self.rounds = RunningStatistic()
+
+    def add(self, deal):
+        self.deals.add(deal.difference)
+        for difference in deal.round_differences:
+            self.rounds.add(difference)
+
+    @property
+    def variance_reduction(self):
+        """
+        How many times fewer rounds duplicate play needs, compared with
+        independent rounds, to estimate the mean difference with the same
+        precision. Each duplicate deal costs two rounds.
+        """
+        duplicate_variance = 2 * self.deals.variance
+        if duplicate_variance == 0:
+            return float("inf")
+        return self.rounds.variance / duplicate_variance
+
+    def __str__(self):
+        low, high = self.deals.confidence_interval()
+        return ("{} deals: mean difference {:.2f} points per round "
+                "(95% CI {:.2f} to {:.2f}), variance reduced {:.1f} times").format(
+            self.deals.count, self.deals.mean, low, high, self.variance_reduction)
+
+
+class DuplicateMatch:
+    """
+    Compares two playing strategies with duplicate deals: every shuffled
+    deck is played twice, the teams swapping seats in between, so both
+    strategies get exactly the same cards. Without a seed, a random one is
+    drawn so that both plays of a deal still share their shuffle.
+    """
+
+    def __init__(self, strategy_a, strategy_b, seed=None, distributor=None, referee=None):
+        self.strategy_a = strategy_a
+        self.strategy_b = strategy_b
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.distributor = distributor or Distributor()
+        self.referee = referee or Referee()
+
+    def play(self, number_of_deals, result=None):
+        result = result if result is not None else DuplicateResult()
+        for deal_id in range(result.deals.count, result.deals.count + number_of_deals):
+            result.add(self.play_deal(deal_id))
+        return result
+
+    def play_deal(self, deal_id):
+        seed = "{}:{}".format(self.seed, deal_id)
+        who_starts = deal_id % 4
+        team_a, team_b = self.new_teams()
+        first = play_round(Round(deal_id, team_a, team_b, Deck(), self.distributor,
+                                 self.referee, who_starts, seed))
+        team_a, team_b = self.new_teams()
+        second = play_round(Round(deal_id, team_b, team_a, Deck(), self.distributor,
+                                  self.referee, who_starts, seed))
+        return DuplicateDeal(first[0], first[1], second[0], second[1])
+
+    def new_teams(self):
+        team_a = Team(0, Player("A1", playing_strategy=self.strategy_a),
+                      Player("A2", playing_strategy=self.strategy_a))
+        team_b = Team(1, Player("B1", playing_strategy=self.strategy_b),
+                      Player("B2", playing_strategy=self.strategy_b))
+        return team_a, team_b
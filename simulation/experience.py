@@ -0,0 +1,192 @@
+"""
+Fixed-capacity ring buffer of self-play experience in shared memory.
+
+Every record has the same layout: the state encoding (state_size float32),
+the mask of legal cards (uint32), the index of the card played (uint8) and
+the return (float32). Producer processes attach to the buffer by name and
+append records; once the buffer is full, new records overwrite the oldest
+ones. Consumers sample records as views of the shared memory, without
+copying or unpickling anything.
+"""
+import random
+import struct
+import time
+from multiprocessing import Lock, shared_memory
+
+from cards.mask import SUIT_INDEX, card_index
+
+HEADER = struct.Struct("<QQQQd")
+STATE_SIZE = 100
+
+
+def record_struct(state_size):
+    return struct.Struct("<{}fIfB3x".format(state_size))
+
+
+class Experience:
+    """View of one record of an ExperienceBuffer"""
+
+    def __init__(self, view, state_size):
+        self.view = view
+        self.state_size = state_size
+
+    @property
+    def state(self):
+        return self.view[:4 * self.state_size].cast("f")
+
+    @property
+    def legal_mask(self):
+        return struct.unpack_from("<I", self.view, 4 * self.state_size)[0]
+
+    @property
+    def value(self):
+        return struct.unpack_from("<f", self.view, 4 * self.state_size + 4)[0]
+
+    @property
+    def action(self):
+        return self.view[4 * self.state_size + 8]
+
+
+class ExperienceBuffer:
+    """
+    Ring buffer of experience records in shared memory.
+
+    Create it in the consumer, then attach producers with
+    ExperienceBuffer.attach(buffer.name, buffer.lock). The lock must be
+    handed to producer processes when they are started.
+    """
+
+    def __init__(self, capacity, state_size=STATE_SIZE, name=None, lock=None):
+        self.record = record_struct(state_size)
+        self.lock = lock if lock is not None else Lock()
+        if name is None:
+            size = HEADER.size + capacity * self.record.size
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+            HEADER.pack_into(self.memory.buf, 0, capacity, state_size, 0, 0, time.time())
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.capacity = capacity
+        self.state_size = state_size
+
+    @classmethod
+    def attach(cls, name, lock):
+        memory = shared_memory.SharedMemory(name=name)
+        capacity, state_size = HEADER.unpack_from(memory.buf, 0)[:2]
+        memory.close()
+        return cls(capacity, state_size, name=name, lock=lock)
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def add(self, state, legal_mask, action, value):
+        with self.lock:
+            capacity, state_size, written, sampled, created = \
+                HEADER.unpack_from(self.memory.buf, 0)
+            offset = HEADER.size + (written % capacity) * self.record.size
+            self.record.pack_into(self.memory.buf, offset, *state, legal_mask, value, action)
+            HEADER.pack_into(self.memory.buf, 0, capacity, state_size, written + 1,
+                             sampled, created)
+
+    def sample(self, batch_size, rng=random):
+        """
+        batch_size records drawn uniformly among those in the buffer. They are
+        views of the shared memory, read without the lock: once the buffer is
+        full, a producer may overwrite a record while it is read. Copy the
+        fields needed (bytes(experience.view)) before the producers wrap
+        around.
+        """
+        with self.lock:
+            capacity, state_size, written, sampled, created = \
+                HEADER.unpack_from(self.memory.buf, 0)
+            if written == 0:
+                return []
+            HEADER.pack_into(self.memory.buf, 0, capacity, state_size, written,
+                             sampled + batch_size, created)
+        size = min(written, capacity)
+        return [self[rng.randrange(size)] for _ in range(batch_size)]
+
+    def __getitem__(self, slot):
+        offset = HEADER.size + slot * self.record.size
+        return Experience(self.memory.buf[offset:offset + self.record.size], self.state_size)
+
+    def __len__(self):
+        return min(self.records_written, self.capacity)
+
+    @property
+    def records_written(self):
+        return HEADER.unpack_from(self.memory.buf, 0)[2]
+
+    @property
+    def records_sampled(self):
+        return HEADER.unpack_from(self.memory.buf, 0)[3]
+
+    @property
+    def records_overwritten(self):
+        return max(0, self.records_written - self.capacity)
+
+    def throughput(self):
+        """Records written and sampled per second since the buffer was created"""
+        _, _, written, sampled, created = HEADER.unpack_from(self.memory.buf, 0)
+        elapsed = max(time.time() - created, 1e-9)
+        return written / elapsed, sampled / elapsed
+
+    def close(self):
+        """Detaches from the shared memory, once every sampled view is released"""
+        self.memory.close()
+
+    def unlink(self):
+        self.memory.unlink()
+
+
+def encode_state(player, trick):
+    """
+    Encoding of what player knows when choosing a card: its hand, the cards
+    already played, the cards of the trick and the trump suit, as STATE_SIZE
+    floats.
+    """
+    state = [0.] * STATE_SIZE
+    hand, played = player.hand.mask, player.tracker.played
+    for index in range(32):
+        state[index] = float(hand >> index & 1)
+        state[32 + index] = float(played >> index & 1)
+    for card in trick:
+        state[64 + card_index(card)] = 1.
+    state[96 + SUIT_INDEX[player.trump_suit]] = 1.
+    return state
+
+
+class ExperienceRecorder:
+    """
+    Playing strategy wrapper that records every decision into an
+    ExperienceBuffer. Attach it to the Game as an observer too: the return
+    of a decision, the share of the round points won by the player's team,
+    is only known once the round is over.
+    """
+
+    def __init__(self, strategy, buffer):
+        self.strategy = strategy
+        self.buffer = buffer
+        self.pending = []
+
+    def __call__(self, player, cards, trick):
+        if self.strategy is None:
+            card = cards[0]
+        else:
+            card = self.strategy(player, cards, trick)
+        legal_mask = 0
+        for playable in cards:
+            legal_mask |= 1 << card_index(playable)
+        self.pending.append((player, encode_state(player, trick), legal_mask,
+                             card_index(card)))
+        return card
+
+    def round_played(self, game, round):
+        total = sum(team.current_game_points for team in round.teams) or 1
+        for player, state, legal_mask, action in self.pending:
+            team = round.get_team_by_id(player.teamID)
+            self.buffer.add(state, legal_mask, action, team.current_game_points / total)
+        self.pending = []
+
+    def game_played(self, game):
+        pass
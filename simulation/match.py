@@ -0,0 +1,171 @@
+import itertools
+import math
+
+from game import Game
+from officials import Distributor, Referee
+from players import Player, Team
+
+
+class SequentialTest:
+    """
+    Wald's sequential probability ratio test on the probability that the
+    first strategy wins a game.
+
+    The test opposes p = 0.5 - delta to p = 0.5 + delta and stops as soon as
+    one of them is accepted, with error rates bounded by alpha and beta.
+    Drawn games carry no information and are ignored.
+    """
+
+    def __init__(self, delta=0.1, alpha=0.05, beta=0.05):
+        if not 0 < delta < 0.5:
+            raise ValueError("delta must be between 0 and 0.5")
+        self.p0 = 0.5 - delta
+        self.p1 = 0.5 + delta
+        self.upper_bound = math.log((1 - beta) / alpha)
+        self.lower_bound = math.log(beta / (1 - alpha))
+        self.win_increment = math.log(self.p1 / self.p0)
+        self.loss_increment = math.log((1 - self.p1) / (1 - self.p0))
+        self.wins = 0
+        self.losses = 0
+        self.draws = 0
+        self.log_likelihood_ratio = 0.0
+
+    def add_result(self, score):
+        """score is 1 for a win of the first strategy, 0 for a loss, 0.5 for a draw"""
+        if score == 1:
+            self.wins += 1
+            self.log_likelihood_ratio += self.win_increment
+        elif score == 0:
+            self.losses += 1
+            self.log_likelihood_ratio += self.loss_increment
+        else:
+            self.draws += 1
+
+    @property
+    def games_played(self):
+        return self.wins + self.losses + self.draws
+
+    @property
+    def decision(self):
+        """1 if the first strategy is better, -1 if it is worse, None while undecided"""
+        if self.log_likelihood_ratio >= self.upper_bound:
+            return 1
+        if self.log_likelihood_ratio <= self.lower_bound:
+            return -1
+        return None
+
+
+class MatchResult:
+    def __init__(self, name_a, name_b, test):
+        self.name_a = name_a
+        self.name_b = name_b
+        self.wins = test.wins
+        self.losses = test.losses
+        self.draws = test.draws
+        self.decision = test.decision
+
+    @property
+    def games_played(self):
+        return self.wins + self.losses + self.draws
+
+    def __str__(self):
+        outcome = {1: "{} is better", -1: "{} is worse", None: "{} is undecided"}
+        return "{} vs {}: {}-{}-{} after {} games, ".format(
+            self.name_a, self.name_b, self.wins, self.losses, self.draws,
+            self.games_played) + outcome[self.decision].format(self.name_a)
+
+
+class Match:
+    """
+    Plays games between two playing strategies until a sequential test
+    settles which one is better, or until max_games have been played.
+
+    Strategies swap team positions every game so that neither of them
+    always sits after the dealer. Given a seed, matches are reproducible.
+    """
+
+    def __init__(self, strategy_a, strategy_b, test=None, max_games=1000,
+                 seed=None, distributor=None, referee=None):
+        self.strategy_a = strategy_a
+        self.strategy_b = strategy_b
+        self.test = test if test is not None else SequentialTest()
+        self.max_games = max_games
+        self.seed = seed
+        self.distributor = distributor or Distributor()
+        self.referee = referee or Referee()
+
+    def play(self, on_game=None):
+        while self.test.decision is None and self.test.games_played < self.max_games:
+            score = self.play_one_game(self.test.games_played)
+            self.test.add_result(score)
+            if on_game is not None:
+                on_game(score)
+        return self.test
+
+    def play_one_game(self, game_id):
+        """Returns 1 if strategy_a wins the game, 0 if it loses, 0.5 on a draw"""
+        team_a = Team(0, Player("A1", playing_strategy=self.strategy_a),
+                      Player("A2", playing_strategy=self.strategy_a))
+        team_b = Team(1, Player("B1", playing_strategy=self.strategy_b),
+                      Player("B2", playing_strategy=self.strategy_b))
+        teams = (team_a, team_b) if game_id % 2 == 0 else (team_b, team_a)
+        seed = None if self.seed is None else "{}:{}".format(self.seed, game_id)
+        game = Game(teams[0], teams[1], self.distributor, self.referee,
+                    verbosity=0, seed=seed)
+        game.play()
+        if team_a.game_night_points > team_b.game_night_points:
+            return 1
+        if team_a.game_night_points < team_b.game_night_points:
+            return 0
+        return 0.5
+
+
+class Ladder:
+    """
+    Elo ladder over named playing strategies.
+
+    Every pair of strategies plays a sequential match, and ratings are
+    updated after each game.
+    """
+
+    def __init__(self, strategies, initial_rating=1500, k_factor=16,
+                 max_games=1000, seed=None, test_factory=SequentialTest):
+        self.strategies = dict(strategies)
+        self.ratings = {name: float(initial_rating) for name in self.strategies}
+        self.k_factor = k_factor
+        self.max_games = max_games
+        self.seed = seed
+        self.test_factory = test_factory
+        self.results = []
+
+    def expected_score(self, name_a, name_b):
+        difference = self.ratings[name_b] - self.ratings[name_a]
+        return 1 / (1 + 10 ** (difference / 400))
+
+    def update_ratings(self, name_a, name_b, score):
+        change = self.k_factor * (score - self.expected_score(name_a, name_b))
+        self.ratings[name_a] += change
+        self.ratings[name_b] -= change
+
+    def play_match(self, name_a, name_b):
+        seed = None if self.seed is None else "{}:{}:{}".format(self.seed, name_a, name_b)
+        match = Match(self.strategies[name_a], self.strategies[name_b],
+                      test=self.test_factory(), max_games=self.max_games, seed=seed)
+        test = match.play(
+            on_game=lambda score: self.update_ratings(name_a, name_b, score))
+        result = MatchResult(name_a, name_b, test)
+        self.results.append(result)
+        return result
+
+    def play_all(self):
+        for name_a, name_b in itertools.combinations(sorted(self.strategies), 2):
+            self.play_match(name_a, name_b)
+        return self.standings()
+
+    def standings(self):
+        """Strategy names and ratings, best first"""
+        return sorted(self.ratings.items(), key=lambda item: -item[1])
+
+    @property
+    def games_played(self):
+        return sum(result.games_played for result in self.results)
@@ -0,0 +1,118 @@
+"""
+Memory footprint of a game, by component.
+
+memory_report walks the objects reachable from a game with sys.getsizeof
+and attributes each of them to the first component it is found in:
+cards, hands, won cards, trackers, the round in play, strategy caches,
+then the rest of the strategies' state. Games, teams and players are not
+walked into, so that components do not swallow each other (a card
+references its owner). MemoryMonitor is a game observer that takes a
+report after every round, with tracemalloc figures if it traces, so that
+growth across a game shows up.
+"""
+import sys
+import tracemalloc
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+
+from players import Player, Team
+
+COMPONENTS = ("cards", "hands", "won_cards", "trackers", "round", "caches", "strategies")
+CACHE_ATTRIBUTES = ("entries", "searches", "table", "cache")
+SKIPPED_TYPES = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType, Player, Team)
+
+
+def deep_size(roots, seen):
+    """(bytes, number of objects) reachable from roots and not in seen, which is updated"""
+    size, number_of_objects = 0, 0
+    stack = list(roots)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, SKIPPED_TYPES):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        number_of_objects += 1
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        if hasattr(obj, "__dict__"):
+            stack.append(vars(obj))
+        for cls in type(obj).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if hasattr(obj, name):
+                    stack.append(getattr(obj, name))
+    return size, number_of_objects
+
+
+def strategies_of(players):
+    """Distinct strategies of players, wrappers (see MemoizedStrategy) unwrapped too"""
+    strategies = []
+    for player in players:
+        for strategy in (player.playing_strategy, player.starting_strategy):
+            while strategy is not None and all(strategy is not other for other in strategies):
+                strategies.append(strategy)
+                strategy = getattr(strategy, "__dict__", {}).get("strategy")
+    return strategies
+
+
+def memory_report(game, round=None):
+    """{component: (bytes, number of objects)} of game and of the round in play"""
+    players = [player for team in game.teams for player in (team.player1, team.player2)]
+    strategies = strategies_of(players)
+    seen = {id(game)}
+    roots = {
+        "cards": [card for player in players for card in player.hand] +
+                 [card for team in game.teams for card in team.won_cards],
+        "hands": [player.hand for player in players],
+        "won_cards": [team.won_cards for team in game.teams],
+        "trackers": [player.tracker for player in players if player.tracker is not None],
+        "round": [round] if round is not None else [],
+        "caches": [getattr(strategy, "__dict__", {})[name] for strategy in strategies
+                   for name in CACHE_ATTRIBUTES if name in getattr(strategy, "__dict__", {})],
+        "strategies": strategies,
+    }
+    return {component: deep_size(roots[component], seen) for component in COMPONENTS}
+
+
+class MemoryMonitor:
+    """
+    Game observer keeping a memory report after every round. With trace,
+    tracemalloc runs while the monitor is attached, and reports also hold
+    the traced memory and its peak, in bytes. stop only ends the tracing
+    the monitor started itself.
+    """
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.reports = []
+        self.started_tracing = trace and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+
+    def round_played(self, game, round):
+        report = {"round": game.number_of_games_played,
+                  "components": memory_report(game, round)}
+        if self.trace:
+            report["traced"], report["peak"] = tracemalloc.get_traced_memory()
+        self.reports.append(report)
+
+    def game_played(self, game):
+        pass
+
+    def growth(self):
+        """Bytes gained by every component between the first and the last report"""
+        if len(self.reports) < 2:
+            return {component: 0 for component in COMPONENTS}
+        first, last = self.reports[0]["components"], self.reports[-1]["components"]
+        return {component: last[component][0] - first[component][0] for component in COMPONENTS}
+
+    def top_allocations(self, limit=10):
+        """Source lines that allocated the most traced memory"""
+        return tracemalloc.take_snapshot().statistics("lineno")[:limit]
+
+    def stop(self):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
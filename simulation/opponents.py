@@ -0,0 +1,236 @@
+"""
+Per-player statistics persisted across sessions, for opponent modelling.
+
+Statistics are counters: (player name, statistic, key) -> count. Updates
+are buffered in memory and written by a background thread, in one SQLite
+transaction per batch. Profiles are read through an LRU cache that also
+holds the updates not yet written, so that reading a cached profile
+never waits for the writer.
+"""
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from cards.mask import SUIT_INDEX, SUITS, VALUES, card_index, cards_to_mask
+from cards.precedence import BEATS
+from .bidding import hand_class
+from .cfr import best_suit
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS counts (
+    player TEXT NOT NULL, statistic TEXT NOT NULL, key TEXT NOT NULL,
+    count INTEGER NOT NULL, PRIMARY KEY (player, statistic, key))"""
+UPSERT = """INSERT INTO counts (player, statistic, key, count) VALUES (?, ?, ?, ?)
+    ON CONFLICT (player, statistic, key) DO UPDATE SET count = count + excluded.count"""
+
+
+class Profile:
+    """Counters of a player, {(statistic, key): count}"""
+
+    def __init__(self, counts=None):
+        self.counts = counts if counts is not None else {}
+
+    def count(self, statistic, key):
+        return self.counts.get((statistic, key), 0)
+
+    def add(self, statistic, key, n=1):
+        self.counts[(statistic, key)] = self.counts.get((statistic, key), 0) + n
+
+    def copy(self):
+        return Profile(dict(self.counts))
+
+    def rate(self, statistic, total_statistic, key):
+        total = self.count(total_statistic, key)
+        return self.count(statistic, key) / total if total > 0 else None
+
+    def take_rate(self, key):
+        """Rate of taking when offered the revealed card, for a hand class key"""
+        return self.rate("taken", "offered", key)
+
+    def leads(self):
+        """{lead kind: count}"""
+        return {key: count for (statistic, key), count in self.counts.items()
+                if statistic == "lead"}
+
+    def trump_partner_rate(self):
+        """Rate of trumping a trick the partner was winning, when not following suit"""
+        return self.rate("trumped_partner", "partner_winning", "")
+
+
+class OpponentStore:
+    """
+    Counters of every player in a SQLite file. add only updates memory;
+    the writer thread commits the pending updates every flush_interval
+    seconds, or on flush and close. Profiles of the cache_size players
+    read last are kept in memory and kept up to date by add.
+    """
+
+    def __init__(self, path, flush_interval=1., cache_size=1024):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.cache = OrderedDict()
+        self.reads = sqlite3.connect(path, check_same_thread=False)
+        self.reads.execute(SCHEMA)
+        self.reads.commit()
+        self.read_lock = threading.Lock()
+        self.batches_written = 0
+        self.stopping = threading.Event()
+        self.wake = threading.Event()
+        self.flushed = threading.Event()
+        self.writer = threading.Thread(target=self.write_batches, daemon=True)
+        self.writer.start()
+
+    def add(self, player, statistic, key, n=1):
+        with self.lock:
+            counter = (player, statistic, key)
+            self.pending[counter] = self.pending.get(counter, 0) + n
+            if player in self.cache:
+                self.cache[player].add(statistic, key, n)
+
+    def profile(self, player):
+        """
+        Copy of the profile of player, written counts and pending updates
+        included: the cached profile changes with add, in any thread.
+        """
+        with self.lock:
+            if player in self.cache:
+                self.cache.move_to_end(player)
+                return self.cache[player].copy()
+        # Holding read_lock, no batch can be committed between the read of
+        # the written counts and that of the pending ones.
+        with self.read_lock:
+            rows = self.reads.execute("SELECT statistic, key, count FROM counts WHERE player = ?",
+                                      (player,)).fetchall()
+            with self.lock:
+                profile = Profile({(statistic, key): count for statistic, key, count in rows})
+                for (name, statistic, key), n in self.pending.items():
+                    if name == player:
+                        profile.add(statistic, key, n)
+                self.cache[player] = profile
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+                return profile.copy()
+
+    def write_batches(self):
+        connection = sqlite3.connect(self.path)
+        try:
+            while True:
+                self.wake.wait(self.flush_interval)
+                self.wake.clear()
+                self.write_batch(connection)
+                if self.stopping.is_set():
+                    break
+        finally:
+            connection.close()
+
+    def write_batch(self, connection):
+        with self.lock:
+            batch = list(self.pending.items())
+        if batch:
+            with self.read_lock:
+                with connection:
+                    connection.executemany(UPSERT, [counter + (n,) for counter, n in batch])
+                with self.lock:
+                    for counter, n in batch:
+                        left = self.pending[counter] - n
+                        if left:
+                            self.pending[counter] = left
+                        else:
+                            del self.pending[counter]
+            self.batches_written += 1
+        self.flushed.set()
+
+    def flush(self, timeout=None):
+        """Has the writer write the pending updates now, and waits for it"""
+        while True:
+            with self.lock:
+                if not self.pending:
+                    return True
+            self.flushed.clear()
+            self.wake.set()
+            if not self.flushed.wait(timeout):
+                return False
+
+    def close(self):
+        """Writes the pending updates and stops the writer"""
+        self.stopping.set()
+        self.wake.set()
+        self.writer.join()
+        self.reads.close()
+
+
+def lead_kind(card, trump):
+    if card >> 3 == trump:
+        return "trump"
+    return VALUES[card & 7]
+
+
+class OpponentObserver:
+    """
+    Game observer feeding an OpponentStore with, for every player by name:
+    the calls offered and taken by hand class, the kind of cards led, and
+    how often a player not following suit trumps a trick its partner is
+    winning. Hand classes are those of the five-card hand and the revealed
+    card, for the revealed suit in the first round of calls, and in the
+    second for the suit named by the taker, or else the best suit of the
+    hand (see cfr.best_suit).
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def round_dealt(self, game, round):
+        self.record_calls(round)
+
+    def round_played(self, game, round):
+        if round.played:
+            self.record_plays(round)
+
+    def game_played(self, game):
+        pass
+
+    def record_calls(self, round):
+        revealed = card_index(round.revealed_card)
+        revealed_suit = revealed >> 3
+        # The first five cards of a hand are those dealt before the calls
+        hands = [cards_to_mask(player.hand[:5]) | 1 << revealed for player in round.players]
+        taker = round.taker.seat if round.taker is not None else None
+        if taker is None:
+            offers = [(1, seat) for seat in range(4)] + [(2, seat) for seat in range(4)]
+        elif round.calling_round == 1:
+            offers = [(1, seat) for seat in range(taker + 1)]
+        else:
+            offers = [(1, seat) for seat in range(4)] + [(2, seat) for seat in range(taker + 1)]
+        for calling_round, seat in offers:
+            if calling_round == 1:
+                trump = revealed_suit
+            elif seat == taker:
+                trump = SUIT_INDEX[round.trump_suit]
+            else:
+                trump = best_suit(hands[seat], revealed_suit)
+            key = "{}:{}".format(calling_round, ",".join(
+                str(int(value)) for value in hand_class(hands[seat], trump)))
+            name = round.players[seat].name
+            self.store.add(name, "offered", key)
+            if seat == taker and calling_round == round.calling_round:
+                self.store.add(name, "taken", key)
+
+    def record_plays(self, round):
+        history = round.history
+        trump = SUITS.index(round.trump_suit)
+        for trick in range(history.current_trick):
+            plays = history.trick(trick)
+            lead = plays[0][1] >> 3
+            self.store.add(round.players[plays[0][0]].name, "lead", lead_kind(plays[0][1], trump))
+            beats = BEATS[trump][lead]
+            winner, winning = plays[0]
+            for seat, card in plays[1:]:
+                if card >> 3 != lead and winner == (seat + 2) % 4:
+                    name = round.players[seat].name
+                    self.store.add(name, "partner_winning", "")
+                    if card >> 3 == trump:
+                        self.store.add(name, "trumped_partner", "")
+                if beats[card] >> winning & 1:
+                    winner, winning = seat, card
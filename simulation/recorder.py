@@ -0,0 +1,52 @@
+"""
+Rounds recorded as JSON lines, one round per line, for offline analysis.
+
+A record holds the round id and seed, the trump suit, the taker seat and
+the revealed card (indexes of cards.mask), the eight-card hands of the four
+seats as masks and the 32 (seat, card index) plays in order.
+"""
+import json
+
+from cards.mask import SUIT_INDEX, card_index
+
+
+def round_record(round):
+    history = round.history
+    hands = [0] * 4
+    plays = []
+    for position in range(len(history)):
+        seat, card = history.seats[position], history.cards[position]
+        hands[seat] |= 1 << card
+        plays.append([seat, card])
+    return {"id": round.id, "seed": round.seed,
+            "trump": SUIT_INDEX[round.trump_suit], "taker": round.taker.seat,
+            "revealed": card_index(round.revealed_card),
+            "hands": hands, "plays": plays}
+
+
+def read_records(path):
+    with open(path) as records:
+        for line in records:
+            if line.strip():
+                yield json.loads(line)
+
+
+class RoundRecorder:
+    """Game observer appending every round played to a JSON lines file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a")
+        self.rounds_recorded = 0
+
+    def round_played(self, game, round):
+        if not round.played:
+            return
+        self.file.write(json.dumps(round_record(round)) + "\n")
+        self.rounds_recorded += 1
+
+    def game_played(self, game):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
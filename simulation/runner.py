@@ -0,0 +1,185 @@
+import json
+import os
+import tempfile
+import time
+
+from game import Game
+from officials import Distributor, Referee
+from players import Player, Team
+from .shard_cache import identity
+from .statistics import Statistics
+
+
+def write_checkpoint(path, state):
+    """Atomically replaces the checkpoint at path with state, as compact JSON"""
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".checkpoint-")
+    try:
+        with os.fdopen(descriptor, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def read_checkpoint(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+class Simulation:
+    """
+    Plays a series of seeded games between two playing strategies and
+    aggregates their outcomes.
+
+    With a checkpoint path, the runner state (games played, scores of the
+    game in progress, aggregates) is saved between rounds every
+    checkpoint_every rounds or checkpoint_interval seconds, whichever comes
+    first. A resumed simulation ends with exactly the same results as an
+    uninterrupted one.
+
+    With a cache (see ShardCache), games are played by shards of shard_size
+    games, and the aggregates of a shard already played with the same
+    strategies, officials and seeds are read from the cache instead. The
+    runner is then only checkpointed between shards.
+    """
+
+    checkpoint_version = 1
+
+    def __init__(self, strategy_a, strategy_b, number_of_games, seed=0,
+                 checkpoint_path=None, checkpoint_every=1000, checkpoint_interval=60.,
+                 distributor=None, referee=None, cache=None, shard_size=100):
+        self.strategy_a = strategy_a
+        self.strategy_b = strategy_b
+        self.number_of_games = number_of_games
+        self.seed = seed
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.distributor = distributor or Distributor()
+        self.referee = referee or Referee()
+        self.cache = cache
+        self.shard_size = shard_size
+        self.games_played = 0
+        self.wins = [0, 0]
+        self.draws = 0
+        self.statistics = Statistics()
+        self.game = None
+        self._rounds_since_checkpoint = 0
+        self._last_checkpoint_time = time.monotonic()
+        self._totals = None
+
+    @classmethod
+    def resume(cls, checkpoint_path, strategy_a, strategy_b, **kwargs):
+        """Rebuilds a simulation from its checkpoint. Strategies are not saved."""
+        state = read_checkpoint(checkpoint_path)
+        if state["version"] != cls.checkpoint_version:
+            raise ValueError("Unsupported checkpoint version {}".format(state["version"]))
+        simulation = cls(strategy_a, strategy_b, state["number_of_games"], state["seed"],
+                         checkpoint_path=checkpoint_path, **kwargs)
+        simulation.games_played = state["games_played"]
+        simulation.wins = list(state["wins"])
+        simulation.draws = state["draws"]
+        simulation.statistics = Statistics.from_dict(state["statistics"])
+        if state["game"] is not None:
+            simulation.game = simulation.new_game(simulation.games_played)
+            simulation.game.restore(state["game"])
+        return simulation
+
+    def run(self):
+        while self.games_played < self.number_of_games:
+            if self.cache is not None and self.game is None:
+                self.run_shard()
+            else:
+                self.play_game()
+        if self.checkpoint_path is not None:
+            self.checkpoint()
+        return self
+
+    def play_game(self):
+        if self.game is None:
+            self.game = self.new_game(self.games_played)
+        while not self.game.is_finished():
+            self.game.play_round()
+            self._rounds_since_checkpoint += 1
+            if self.checkpoint_due():
+                self.checkpoint()
+        self.game.finish()
+        self.record_winner(self.game)
+        self.games_played += 1
+        self.game = None
+
+    def shard_key(self, start, end):
+        return self.cache.key({"version": self.checkpoint_version,
+                               "strategies": [identity(self.strategy_a), identity(self.strategy_b)],
+                               "rules": [identity(self.distributor), identity(self.referee)],
+                               "seed": self.seed, "games": [start, end]})
+
+    def run_shard(self):
+        """Plays the games up to the end of the shard, or reads their aggregates from the cache"""
+        start = self.games_played
+        end = min(start + self.shard_size - start % self.shard_size, self.number_of_games)
+        key = self.shard_key(start, end)
+        shard = self.cache.get(key)
+        if shard is None:
+            self._totals = self.wins, self.draws, self.statistics
+            self.wins, self.draws, self.statistics = [0, 0], 0, Statistics()
+            try:
+                while self.games_played < end:
+                    self.play_game()
+                shard = {"wins": self.wins, "draws": self.draws,
+                         "statistics": self.statistics.to_dict()}
+            finally:
+                self.wins, self.draws, self.statistics = self._totals
+                self._totals = None
+                self.games_played = start
+                self.game = None
+            self.cache.put(key, shard)
+        self.games_played = end
+        self.wins = [wins + shard_wins for wins, shard_wins in zip(self.wins, shard["wins"])]
+        self.draws += shard["draws"]
+        self.statistics.merge(Statistics.from_dict(shard["statistics"]))
+        if self.checkpoint_due():
+            self.checkpoint()
+
+    def new_game(self, game_id):
+        team_a = Team(0, Player("A1", playing_strategy=self.strategy_a),
+                      Player("A2", playing_strategy=self.strategy_a))
+        team_b = Team(1, Player("B1", playing_strategy=self.strategy_b),
+                      Player("B2", playing_strategy=self.strategy_b))
+        teams = (team_a, team_b) if game_id % 2 == 0 else (team_b, team_a)
+        return Game(teams[0], teams[1], self.distributor, self.referee, verbosity=0,
+                    observers=[self.statistics], seed="{}:{}".format(self.seed, game_id))
+
+    def record_winner(self, game):
+        points = {team.id: team.game_night_points for team in game.teams}
+        if points[0] > points[1]:
+            self.wins[0] += 1
+        elif points[0] < points[1]:
+            self.wins[1] += 1
+        else:
+            self.draws += 1
+
+    def checkpoint_due(self):
+        if self.checkpoint_path is None or self._totals is not None:
+            return False
+        return self._rounds_since_checkpoint >= self.checkpoint_every or \
+            time.monotonic() - self._last_checkpoint_time >= self.checkpoint_interval
+
+    def checkpoint(self):
+        write_checkpoint(self.checkpoint_path, self.to_dict())
+        self._rounds_since_checkpoint = 0
+        self._last_checkpoint_time = time.monotonic()
+
+    def to_dict(self):
+        return {"version": self.checkpoint_version,
+                "seed": self.seed,
+                "number_of_games": self.number_of_games,
+                "games_played": self.games_played,
+                "wins": list(self.wins),
+                "draws": self.draws,
+                "statistics": self.statistics.to_dict(),
+                "game": self.game.to_dict() if self.game is not None else None}
@@ -0,0 +1,134 @@
+"""
+On-disk cache of the results of simulation shards, addressed by content.
+
+A shard is a range of seeded games. Its result only depends on the
+strategies, the rules and the seeds, so the sha256 of these is the key of
+its file, and a rerun where only one strategy changed plays again the
+shards of that strategy only. Strategies and officials are identified by
+their qualified name and the primitive attributes of instances (see
+identity), or by an identity attribute, and by a version attribute if they
+have one: bump it when their code changes, or the results of the previous
+version are served. Files are evicted least recently used first once the
+cache holds more than max_bytes.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from functools import partial
+from types import FunctionType
+
+PRIMITIVE_TYPES = (bool, int, float, str, type(None))
+
+
+def configuration(obj):
+    """Public attributes of obj of primitive types (or sequences of them), bytes being hashed"""
+    configuration = {}
+    for name, value in getattr(obj, "__dict__", {}).items():
+        if name.startswith("_"):
+            continue
+        if isinstance(value, (bytes, bytearray)):
+            configuration[name] = hashlib.sha256(value).hexdigest()
+        elif isinstance(value, PRIMITIVE_TYPES) or isinstance(value, (list, tuple)) and \
+                all(isinstance(item, PRIMITIVE_TYPES) for item in value):
+            configuration[name] = value
+    return configuration
+
+
+def identity(obj):
+    """
+    Name, configuration and version of a strategy or of an official. A
+    wrapper (an object with a strategy attribute) is identified by its
+    class and the strategy it wraps, its own state being bookkeeping.
+    Local functions and lambdas cannot be told apart by name, and need an
+    identity attribute.
+    """
+    if obj is None:
+        return None
+    name = getattr(obj, "identity", None)
+    wrapped = getattr(obj, "__dict__", {}).get("strategy")
+    if name is None:
+        if isinstance(obj, partial):
+            name = "{}({!r}, {!r})".format(identity(obj.func), obj.args, sorted(obj.keywords.items()))
+        elif isinstance(obj, (FunctionType, type)):
+            if "<" in obj.__qualname__:
+                raise ValueError("{} needs an identity attribute to be cached".format(obj.__qualname__))
+            name = "{}.{}".format(obj.__module__, obj.__qualname__)
+        else:
+            name = "{}.{}".format(type(obj).__module__, type(obj).__qualname__)
+            if wrapped is None and configuration(obj):
+                name += json.dumps(configuration(obj), sort_keys=True, separators=(",", ":"))
+    version = getattr(obj, "version", None)
+    if version is not None:
+        name = "{}:{}".format(name, version)
+    return name if wrapped is None else "{}({})".format(name, identity(wrapped))
+
+
+class ShardCache:
+    def __init__(self, directory, max_bytes=64 * 2 ** 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(description):
+        """sha256 of a JSON description of a shard"""
+        encoded = json.dumps(description, sort_keys=True, separators=(",", ":")).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        """Result stored under key, or None"""
+        path = self.path(key)
+        try:
+            with open(path) as shard_file:
+                result = json.load(shard_file)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, prefix=".shard-")
+        try:
+            with os.fdopen(descriptor, "w") as shard_file:
+                json.dump(result, shard_file, separators=(",", ":"))
+            os.replace(temporary_path, self.path(key))
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+        self.evict()
+
+    def entries(self):
+        """(last use, size, path) of the cached files, least recently used first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                path = os.path.join(self.directory, name)
+                try:
+                    status = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, path))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
@@ -0,0 +1,243 @@
+import math
+
+from cards import Card
+
+
+class RunningStatistic:
+    """
+    Mean and variance of a stream of values, using Welford's algorithm.
+
+    Memory usage is constant whatever the number of values added, and two
+    statistics computed on different streams can be merged.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def standard_deviation(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def standard_error(self):
+        return math.sqrt(self.variance / self.count) if self.count > 0 else 0.0
+
+    def confidence_interval(self, z=1.96):
+        """Normal approximation of the confidence interval of the mean"""
+        margin = z * self.standard_error
+        return self.mean - margin, self.mean + margin
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean, "m2": self.m2,
+                "minimum": self.minimum, "maximum": self.maximum}
+
+    @classmethod
+    def from_dict(cls, data):
+        statistic = cls()
+        statistic.count = data["count"]
+        statistic.mean = data["mean"]
+        statistic.m2 = data["m2"]
+        statistic.minimum = data["minimum"]
+        statistic.maximum = data["maximum"]
+        return statistic
+
+
+class Histogram:
+    """Fixed-bin histogram over [low, high), with underflow and overflow bins"""
+
+    def __init__(self, low, high, number_of_bins):
+        if high <= low or number_of_bins <= 0:
+            raise ValueError("Invalid histogram definition")
+        self.low = low
+        self.high = high
+        self.number_of_bins = number_of_bins
+        self.bin_width = (high - low) / number_of_bins
+        self.counts = [0] * number_of_bins
+        self.underflow = 0
+        self.overflow = 0
+
+    def add(self, value):
+        if value < self.low:
+            self.underflow += 1
+        elif value >= self.high:
+            self.overflow += 1
+        else:
+            self.counts[int((value - self.low) / self.bin_width)] += 1
+
+    def merge(self, other):
+        if (self.low, self.high, self.number_of_bins) != \
+                (other.low, other.high, other.number_of_bins):
+            raise ValueError("Cannot merge histograms with different bins")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+    @property
+    def total(self):
+        return sum(self.counts) + self.underflow + self.overflow
+
+    def bins(self):
+        """Yields (bin lower bound, bin upper bound, count)"""
+        for i, count in enumerate(self.counts):
+            yield (self.low + i * self.bin_width,
+                   self.low + (i + 1) * self.bin_width, count)
+
+    def to_dict(self):
+        return {"low": self.low, "high": self.high,
+                "number_of_bins": self.number_of_bins,
+                "counts": list(self.counts),
+                "underflow": self.underflow, "overflow": self.overflow}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["low"], data["high"], data["number_of_bins"])
+        histogram.counts = list(data["counts"])
+        histogram.underflow = data["underflow"]
+        histogram.overflow = data["overflow"]
+        return histogram
+
+
+class ContractCounter:
+    """Number of contracts taken and won, by trump suit and taker seat"""
+
+    suits = list(Card.suit_names)
+
+    def __init__(self):
+        self.taken = [[0] * 4 for _ in self.suits]
+        self.won = [[0] * 4 for _ in self.suits]
+
+    def add(self, suit, seat, won):
+        i = self.suits.index(suit)
+        self.taken[i][seat] += 1
+        if won:
+            self.won[i][seat] += 1
+
+    def merge(self, other):
+        for i in range(len(self.suits)):
+            for seat in range(4):
+                self.taken[i][seat] += other.taken[i][seat]
+                self.won[i][seat] += other.won[i][seat]
+
+    def success_rate(self, suit=None, seat=None):
+        """Success rate of contracts, optionally restricted to a suit and/or a seat"""
+        suit_indexes = range(len(self.suits)) if suit is None \
+            else [self.suits.index(suit)]
+        seats = range(4) if seat is None else [seat]
+        taken = sum(self.taken[i][s] for i in suit_indexes for s in seats)
+        won = sum(self.won[i][s] for i in suit_indexes for s in seats)
+        return won / taken if taken > 0 else None
+
+    def to_dict(self):
+        return {"taken": [list(row) for row in self.taken],
+                "won": [list(row) for row in self.won]}
+
+    @classmethod
+    def from_dict(cls, data):
+        counter = cls()
+        counter.taken = [list(row) for row in data["taken"]]
+        counter.won = [list(row) for row in data["won"]]
+        return counter
+
+
+class Statistics:
+    """
+    Online aggregator of round and game outcomes.
+
+    Attach it to a Game as an observer, or feed it rounds and games by hand.
+    Every accumulator has a fixed size, statistics computed in different
+    processes can be merged, and to_dict gives a snapshot at any time.
+    """
+
+    def __init__(self):
+        self.rounds_not_played = 0
+        self.taker_points = RunningStatistic()
+        self.defence_points = RunningStatistic()
+        self.taker_points_histogram = Histogram(0, 270, 27)
+        self.contracts = ContractCounter()
+        self.game_lengths = RunningStatistic()
+        self.game_lengths_histogram = Histogram(0, 50, 50)
+
+    def round_played(self, game, round):
+        self.record_round(round)
+
+    def game_played(self, game):
+        self.record_game(game)
+
+    def record_round(self, round):
+        if not round.played:
+            self.rounds_not_played += 1
+            return
+        taking_team = round.get_team_by_id(round.taker.teamID)
+        defending_team = round.get_other_team_by_id(round.taker.teamID)
+        taker_points = taking_team.current_game_points
+        defence_points = defending_team.current_game_points
+        self.taker_points.add(taker_points)
+        self.defence_points.add(defence_points)
+        self.taker_points_histogram.add(taker_points)
+        seat = round.players.index(round.taker)
+        self.contracts.add(round.trump_suit, seat, taker_points > defence_points)
+
+    def record_game(self, game):
+        self.game_lengths.add(game.number_of_games_played)
+        self.game_lengths_histogram.add(game.number_of_games_played)
+
+    def merge(self, other):
+        self.rounds_not_played += other.rounds_not_played
+        self.taker_points.merge(other.taker_points)
+        self.defence_points.merge(other.defence_points)
+        self.taker_points_histogram.merge(other.taker_points_histogram)
+        self.contracts.merge(other.contracts)
+        self.game_lengths.merge(other.game_lengths)
+        self.game_lengths_histogram.merge(other.game_lengths_histogram)
+
+    def to_dict(self):
+        return {"rounds_not_played": self.rounds_not_played,
+                "taker_points": self.taker_points.to_dict(),
+                "defence_points": self.defence_points.to_dict(),
+                "taker_points_histogram": self.taker_points_histogram.to_dict(),
+                "contracts": self.contracts.to_dict(),
+                "game_lengths": self.game_lengths.to_dict(),
+                "game_lengths_histogram": self.game_lengths_histogram.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        statistics = cls()
+        statistics.rounds_not_played = data["rounds_not_played"]
+        statistics.taker_points = RunningStatistic.from_dict(data["taker_points"])
+        statistics.defence_points = RunningStatistic.from_dict(data["defence_points"])
+        statistics.taker_points_histogram = Histogram.from_dict(data["taker_points_histogram"])
+        statistics.contracts = ContractCounter.from_dict(data["contracts"])
+        statistics.game_lengths = RunningStatistic.from_dict(data["game_lengths"])
+        statistics.game_lengths_histogram = Histogram.from_dict(data["game_lengths_histogram"])
+        return statistics
@@ -0,0 +1,305 @@
+"""
+Capture of slow rounds, to reproduce latency outliers in isolation.
+
+A Watchdog is a game observer that times every round, and every decision
+of the strategies it wraps. When a round, or one of its decisions, takes
+longer than its threshold, the round is written to the capture directory
+as JSON: round id, seed and starting seat, the deal (hands in the order
+they were dealt, revealed card, taker and trump), the strategies of every
+seat, the plays and the timings. With profile, each round runs under
+cProfile and the statistics of slow rounds are written next to the
+capture.
+
+    python -m simulation.watchdog CAPTURE [--strategy module:name] [--profile OUT]
+
+replays a captured round from its deal, with the captured strategies or
+the given playing strategy, and prints where the time went. Strategies are
+captured as described by describe_strategy; a seat whose strategy cannot
+be rebuilt (a lambda, or an instance needing arguments that were not
+captured) replays with the default strategy, with a warning.
+"""
+import argparse
+import cProfile
+import importlib
+import json
+import os
+import pstats
+import time
+import warnings
+from functools import partial
+from types import BuiltinFunctionType, FunctionType
+
+from cards import Deck
+from cards.mask import SUIT_INDEX, SUITS, card_from_index, card_index
+from game import Round
+from officials import Distributor, Referee
+from players import Player, Team
+from .recorder import round_record
+
+
+class TimedStrategy:
+    """Strategy wrapper reporting the duration of every decision to a Watchdog"""
+
+    def __init__(self, strategy, watchdog):
+        self.strategy = strategy
+        self.watchdog = watchdog
+
+    def __call__(self, player, *arguments):
+        start = time.perf_counter()
+        try:
+            if self.strategy is None:
+                return arguments[0][0]
+            return self.strategy(player, *arguments)
+        finally:
+            self.watchdog.decision_made(player, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        if name == "strategy":
+            raise AttributeError(name)
+        return getattr(self.strategy, name)
+
+
+PRIMITIVE_TYPES = (bool, int, float, str, type(None))
+
+
+def describe_strategy(strategy):
+    """
+    JSON description of a strategy, for load_strategy: the name of a
+    function, the function and primitive arguments of a partial, or the
+    class of an instance with its attributes of primitive types, bytes and
+    functions (complete if these are all its attributes) and its wrapped
+    strategy.
+    """
+    while isinstance(strategy, TimedStrategy):
+        strategy = strategy.strategy
+    if strategy is None:
+        return None
+    if isinstance(strategy, (FunctionType, BuiltinFunctionType)):
+        return {"name": "{}:{}".format(strategy.__module__, strategy.__qualname__)}
+    if isinstance(strategy, partial):
+        arguments = list(strategy.args) + list(strategy.keywords.values())
+        return {"partial": describe_strategy(strategy.func), "args": list(strategy.args),
+                "keywords": dict(strategy.keywords),
+                "complete": all(isinstance(argument, PRIMITIVE_TYPES) for argument in arguments)}
+    cls = type(strategy)
+    attributes = {name: value for name, value in getattr(strategy, "__dict__", {}).items()
+                  if name != "strategy"}
+    description = {"name": "{}:{}".format(cls.__module__, cls.__qualname__),
+                   "state": {name: value for name, value in attributes.items()
+                             if isinstance(value, PRIMITIVE_TYPES)},
+                   "bytes": {name: value.hex() for name, value in attributes.items()
+                             if isinstance(value, bytes)},
+                   "functions": {name: describe_strategy(value) for name, value in attributes.items()
+                                 if isinstance(value, FunctionType)}}
+    description["complete"] = sum(len(description[kind]) for kind in ("state", "bytes", "functions")) \
+        == len(attributes)
+    if "strategy" in getattr(strategy, "__dict__", {}):
+        description["strategy"] = describe_strategy(strategy.strategy)
+    return description
+
+
+def load_strategy(description):
+    """
+    Strategy described by describe_strategy. An instance is rebuilt from its
+    attributes if they were all captured, or else created again with its
+    wrapped strategy, or no arguments, and its captured attributes.
+    Raises ValueError if the strategy cannot be rebuilt.
+    """
+    if description is None:
+        return None
+    try:
+        if "partial" in description:
+            if not description["complete"]:
+                raise ValueError("partial with arguments that were not captured")
+            return partial(load_strategy(description["partial"]), *description["args"],
+                           **description["keywords"])
+        obj = load_object(description["name"])
+        if "state" not in description:
+            return obj
+        if description["complete"]:
+            strategy = obj.__new__(obj)
+        elif "strategy" in description:
+            strategy = obj(load_strategy(description["strategy"]))
+        else:
+            strategy = obj()
+        vars(strategy).update(description["state"])
+        vars(strategy).update({name: bytes.fromhex(value) for name, value in description["bytes"].items()})
+        vars(strategy).update({name: load_strategy(value) for name, value in description["functions"].items()})
+        if "strategy" in description:
+            strategy.strategy = load_strategy(description["strategy"])
+        return strategy
+    except (AttributeError, ImportError, TypeError, ValueError) as error:
+        raise ValueError("Cannot rebuild {}: {}".format(
+            description.get("name", "partial strategy"), error)) from error
+
+
+def replay_strategy(description, seat, kind):
+    """Strategy of description, or the default strategy with a warning if it cannot be rebuilt"""
+    try:
+        return load_strategy(description)
+    except ValueError as error:
+        warnings.warn("Seat {} replays with the default {} strategy. {}".format(seat, kind, error))
+        return None
+
+
+class Watchdog:
+    def __init__(self, directory, round_threshold=1., decision_threshold=.1, profile=False):
+        self.directory = directory
+        self.round_threshold = round_threshold
+        self.decision_threshold = decision_threshold
+        self.profile = profile
+        self.profiler = None
+        self.started = None
+        self.deal = None
+        self.decisions = []
+        self.captures = []
+        os.makedirs(directory, exist_ok=True)
+
+    def watch(self, player):
+        """Times the decisions of player's playing strategy"""
+        player.playing_strategy = TimedStrategy(player.playing_strategy, self)
+        return player
+
+    def decision_made(self, player, duration):
+        self.decisions.append({"seat": player.seat, "cards_left": len(player.hand),
+                               "duration": duration})
+
+    def round_started(self, game, round):
+        self.deal = None
+        self.decisions = []
+        if self.profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.started = time.perf_counter()
+
+    def round_dealt(self, game, round):
+        self.deal = {"hands": [[card_index(card) for card in player.hand] for player in round.players],
+                     "revealed": card_index(round.revealed_card),
+                     "taker": round.taker.seat if round.taker is not None else None,
+                     "trump": SUIT_INDEX[round.trump_suit] if round.trump_suit is not None else None}
+
+    def round_played(self, game, round):
+        duration = time.perf_counter() - self.started
+        if self.profiler is not None:
+            self.profiler.disable()
+        slowest = max((decision["duration"] for decision in self.decisions), default=0.)
+        if duration > self.round_threshold or slowest > self.decision_threshold:
+            self.capture(game, round, duration)
+        self.profiler = None
+
+    def game_played(self, game):
+        pass
+
+    def capture(self, game, round, duration):
+        capture = {"game_seed": getattr(game, "seed", None), "round_id": round.id,
+                   "seed": round.seed, "who_starts": round.who_starts,
+                   "duration": duration, "decisions": self.decisions, "deal": self.deal,
+                   "strategies": [[describe_strategy(player.playing_strategy),
+                                   describe_strategy(player.starting_strategy)]
+                                  for player in round.players]}
+        if round.played:
+            capture.update(round_record(round))
+        name = "round-{}-{}-{}".format(capture["game_seed"], round.id,
+                                       time.time_ns()).replace(os.sep, "_")
+        path = os.path.join(self.directory, name + ".json")
+        with open(path, "w") as capture_file:
+            json.dump(capture, capture_file)
+        if self.profiler is not None:
+            self.profiler.dump_stats(os.path.join(self.directory, name + ".prof"))
+        self.captures.append(path)
+        return path
+
+
+def deal_captured(round, deal):
+    """
+    Deals the captured hands, in the order they were dealt, and gives the
+    revealed card and the trump as captured. If everyone passed, the calls
+    are made again instead, and whether everyone passes again is returned.
+    """
+    for player, hand in zip(round.players, deal["hands"]):
+        for index in hand:
+            player.add_card_to_hand(card_from_index(index))
+    round.revealed_card = card_from_index(deal["revealed"])
+    if deal["taker"] is None:
+        no_one_started, _ = round.first_round_calls(round.revealed_card)
+        if no_one_started:
+            no_one_started, _ = round.second_round_calls(round.revealed_card)
+        round.played = False
+        return no_one_started
+    taker = round.players[deal["taker"]]
+    round.set_starting_team_from_player(taker)
+    round.tracker.card_revealed(taker.seat, round.revealed_card)
+    round.set_trump_suit(SUITS[deal["trump"]])
+    round.announce_declarations()
+    return True
+
+
+def replay(path, playing_strategy=None, starting_strategy=None, profile_path=None):
+    """
+    Deals and plays a captured round again, and returns the replayed round
+    and whether its plays are those of the capture. Every seat plays with
+    its captured strategies, unless strategies are given.
+    """
+    with open(path) as capture_file:
+        capture = json.load(capture_file)
+    strategies = capture.get("strategies") or [[None, None]] * 4
+    deal = capture.get("deal")
+    # Calls are only made again if the deal was not captured, or if everyone passed
+    calls_replayed = deal is None or deal["taker"] is None
+    seats = [Player("Player {}".format(seat),
+                    starting_strategy if starting_strategy is not None or not calls_replayed
+                    else replay_strategy(strategies[seat][1], seat, "starting"),
+                    playing_strategy if playing_strategy is not None
+                    else replay_strategy(strategies[seat][0], seat, "playing"))
+             for seat in range(4)]
+    who_starts = capture["who_starts"]
+    # Round seats players[(who_starts + seat) % 4] of team1.player1,
+    # team2.player1, team1.player2, team2.player2
+    players = [seats[(position - who_starts) % 4] for position in range(4)]
+    teams = Team(0, players[0], players[2]), Team(1, players[1], players[3])
+    round = Round(capture["round_id"], teams[0], teams[1], Deck(), Distributor(), Referee(),
+                  who_starts, capture["seed"])
+    profiler = cProfile.Profile() if profile_path is not None else None
+    if profiler is not None:
+        profiler.enable()
+    if deal is not None:
+        same_calls = deal_captured(round, deal)
+    else:
+        round.distribute_cards_and_choose_trump()
+        same_calls = True
+    if round.played:
+        round.play()
+        round.count_points()
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(profile_path)
+    plays = round_record(round)["plays"] if round.played else None
+    return round, same_calls and plays == capture.get("plays")
+
+
+def load_object(name):
+    """Object named module:attribute"""
+    module, attribute = name.split(":")
+    return getattr(importlib.import_module(module), attribute)
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Replays a round captured by a Watchdog")
+    parser.add_argument("capture")
+    parser.add_argument("--strategy", default=None, help="playing strategy, as module:name")
+    parser.add_argument("--starting-strategy", default=None, help="starting strategy, as module:name")
+    parser.add_argument("--profile", default=None, help="where to write the profile statistics")
+    options = parser.parse_args(arguments)
+    playing = load_object(options.strategy) if options.strategy else None
+    starting = load_object(options.starting_strategy) if options.starting_strategy else None
+    start = time.perf_counter()
+    _, identical = replay(options.capture, playing, starting, options.profile)
+    print("Round replayed in {:.3f}s, {}".format(
+        time.perf_counter() - start,
+        "same plays as captured" if identical else "plays differ from the capture"))
+    if options.profile:
+        pstats.Stats(options.profile).sort_stats("cumulative").print_stats(15)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,30 @@
+import gc
+import multiprocessing
+import os
+import random
 import re
+import tracemalloc
 from io import StringIO
 
 import pytest
 
 from cards import Card, CardStack, Deck, Hand, Trick, Trump, NonTrump, CardSet
+from cards.mask import ALL_CARDS, SUIT_INDEX, VALUE_INDEX, card_index, card_mask, cards_to_mask, mask_to_cards
+from cards.declarations import best_declaration
+from cards.features import FEATURES, feature, hand_features
+from cards.precedence import NO_TRUMP, beats
 from cards.trump import RankedCard
 from game import Game, Round
 from game.commentators import GameCommentator, RoundCommentator
 from officials import Distributor, Referee
-from players import Player, Team
+from officials.scoring import RoundScore, score_round, score_rounds
+from players import CardTracker, MemoizedStrategy, Player, Team
+from players.strategy_cache import playing_key, starting_key
+from search import (DealSampler, SuitDistribution, GameState, ISMCTS, ParallelSearch, SharedTranspositionTable, Solver,
+                    Tablebase, distribution, tablebase)
+from simulation import (BiddingPolicy, BiddingSimulator, BiddingSolver, DuplicateMatch, ExperienceBuffer, ExperienceRecorder, Histogram, Ladder, Match,
+                        OpponentObserver, OpponentStore, RoundRecorder, RunningStatistic, SequentialTest, ShardCache, Simulation,
+                        Statistics, TrumpStrengthPolicy, analysis, bidding, cfr, memory, read_records, shard_cache, watchdog)
 
 
 def regex_builder(cardstackname):
@@ -188,7 +204,7 @@ class TestPlayer:
 
     def test_player_should_use_starting_strategy(self):
         deck = Deck()
-        player = Player(starting_strategy=lambda: True)
+        player = Player(starting_strategy=lambda player, card: True)
         # with this strategy, the player choose always start
         # no matter the card he's being offered
         for card in deck:
@@ -338,16 +354,37 @@ class TestRound:
         self.round.play()
         assert len(self.round.get_team_by_id(0).won_cards) + len(self.round.get_team_by_id(1).won_cards) == 32
 
-    def test_total_points_at_the_end_should_be_162(self):
+    def test_total_points_at_the_end_should_be_162_plus_declarations(self):
         self.round.distribute_cards_and_choose_trump()
         self.round.play()
         self.round.count_points()
-        assert sum([team.current_game_points for team in self.round.teams]) == 162
+        declared = sum(team.declaration_points + team.belote_points for team in self.round.teams)
+        assert sum([team.current_game_points for team in self.round.teams]) == 162 + declared
 
     def test_play_should_not_fail(self):
         self.round.distribute_cards_and_choose_trump()
         assert self.round.play() == 0
 
+    def test_winner_of_a_trick_should_lead_the_next_one(self):
+        self.round.distribute_cards_and_choose_trump()
+        self.round.play()
+        history = self.round.history
+        assert history.current_trick == 8 and len(history) == 32
+        assert history.leader(0) == 0
+        for trick in range(7):
+            assert history.leader(trick + 1) == history.winner(trick)
+        assert self.round.last_trick_winner == history.last_winner
+
+    def test_history_should_record_every_play(self):
+        self.round.distribute_cards_and_choose_trump()
+        self.round.play()
+        history = self.round.history
+        assert [play for trick in range(8) for play in history.trick(trick)] == \
+            self.round.tracker.history
+        for trick in range(8):
+            for seat, card in history.trick(trick):
+                assert history.card_played_by(seat, trick) == card
+
 
 class TestTrick:
     def test_winner_should_return_correct_index_without_offset(self):
@@ -362,6 +399,41 @@ class TestTrick:
         trick = Trick(cards=[Card("D", "E"), Card("H", "T"), Card("S", "J"), Card("H", "Q")]).to_ranked("C")
         assert trick.winner == Card("D", "E")
 
+    @staticmethod
+    def scanned_winner(cards):
+        winner = cards[0]
+        for card in cards[1:]:
+            if (card.is_trump or card.suit == cards[0].suit) and card.is_higher_than(winner):
+                winner = card
+        return winner
+
+    def test_winner_should_be_updated_as_cards_are_added(self):
+        rng = random.Random(41)
+        deck = list(Deck())
+        for _ in range(200):
+            suit = rng.choice("CDHS")
+            cards = [card.to_ranked(suit) for card in rng.sample(deck, 4)]
+            trick = Trick(trump_suit=suit)
+            for i, card in enumerate(cards):
+                trick.add_card(card)
+                assert trick.winner == self.scanned_winner(cards[:i + 1])
+
+    def test_trump_suit_should_be_found_from_ranked_cards(self):
+        trick = Trick(cards=[Card("D", "A"), Card("D", "T")]).to_ranked("H")
+        assert trick.winner == Card("D", "A")
+        trick.add_card(Card("H", "S").to_ranked("H"))
+        assert trick.winner == Card("H", "S")
+        trick.pop(2)
+        assert trick.winner == Card("D", "A")
+
+    def test_precedence_tables_should_follow_the_rules(self):
+        jack, nine, ace = card_index(Card("H", "J")), card_index(Card("H", "N")), card_index(Card("H", "A"))
+        seven_of_spades = card_index(Card("S", "S"))
+        assert beats(jack, nine, SUIT_INDEX["H"], SUIT_INDEX["H"])
+        assert beats(ace, nine, NO_TRUMP, SUIT_INDEX["H"])
+        assert beats(seven_of_spades, ace, SUIT_INDEX["S"], SUIT_INDEX["H"])
+        assert not beats(seven_of_spades, ace, NO_TRUMP, SUIT_INDEX["H"])
+
 
 class TestReferee:
     def setup_method(self, method):
@@ -377,6 +449,144 @@ class TestReferee:
         assert self.referee.count_team_points(team) == 0
 
 
+class TestScoring:
+    def test_contract_made_should_score_both_teams(self):
+        assert score_round(0, 100, 5, belotes=(0, 20)) == RoundScore((100, 82))
+        assert score_round(1, 60, 5) == RoundScore((60, 102))
+        assert score_round(1, 100, 5) == RoundScore((162, 0))
+
+    def test_dedans_should_give_162_to_the_defence(self):
+        assert score_round(0, 50, 3, declarations=(20, 0), belotes=(20, 0)) == RoundScore((20, 162 + 20))
+
+    def test_capot_should_be_worth_252(self):
+        assert score_round(0, 162, 8) == RoundScore((252, 0))
+        assert score_round(0, 0, 0, belotes=(20, 0)) == RoundScore((20, 252))
+
+    def test_litige_should_hold_the_taker_points_in_escrow(self):
+        score = score_round(1, 81, 4)
+        assert score.litige
+        assert score == RoundScore((81, 0), escrow=81)
+
+    def test_columns_should_be_scored_like_single_rounds(self):
+        rng = random.Random(42)
+        outcomes = [(rng.randrange(2), rng.randrange(163), rng.randrange(9),
+                     rng.choice((0, 20, 50)), rng.choice((0, 20)), rng.choice((0, 20)), 0)
+                    for _ in range(500)]
+        columns = [list(column) for column in zip(*outcomes)]
+        points_0, points_1, escrows = score_rounds(*columns)
+        for i, (taker, points, tricks, declarations_0, declarations_1, belote_0, belote_1) in enumerate(outcomes):
+            score = score_round(taker, points, tricks, (declarations_0, declarations_1), (belote_0, belote_1))
+            assert score == RoundScore((points_0[i], points_1[i]), escrows[i])
+
+    def test_columns_without_truth_value_should_be_scored(self):
+        class Column(list):
+            def __bool__(self):
+                raise ValueError("The truth value of an array is ambiguous")
+
+        class Points(int):
+            pass
+
+        points_0, points_1, _ = score_rounds(Column([0, 1]), Column([100, 40]), Column([5, 2]),
+                                             Column([20, 0]), None, Column([0, 20]))
+        assert list(points_0) == [120, 40 + 20] and list(points_1) == [62, 122]
+        assert score_round(0, Points(100), 5) == score_round(0, 100, 5)
+
+    def test_escrow_should_go_to_the_winner_of_the_next_round(self):
+        team1, team2 = Team(0, Player(), Player()), Team(1, Player(), Player())
+        game = Game(team1, team2, Distributor(), Referee(), verbosity=0, seed=0)
+        game.escrow = 81
+        game.play_round()
+        winner = Referee.winning_team(game.teams)
+        assert winner is not None and game.escrow == 0
+        assert winner.game_night_points == winner.current_game_points
+        assert winner.current_game_points >= 81
+
+    def test_statistics_after_a_litige_should_not_count_the_escrow_payout(self):
+        team1, team2 = Team(0, Player(), Player()), Team(1, Player(), Player())
+        statistics = Statistics()
+        game = Game(team1, team2, Distributor(), Referee(), verbosity=0, observers=[statistics], seed=0)
+        game.escrow = 81
+        game.play_round()
+        recorded = statistics.taker_points.mean + statistics.defence_points.mean
+        assert recorded == sum(team.current_game_points for team in game.teams) - 81
+
+class TestDeclarations:
+    def test_sequences_should_be_found(self):
+        tierce = Hand([Card("H", "S"), Card("H", "E"), Card("H", "N")])
+        assert tierce.declarations("C") == (20, 0)
+        cinquante = Hand([Card("D", "J"), Card("D", "Q"), Card("D", "K"), Card("D", "A")])
+        assert cinquante.declarations("C") == (50, 0)
+        cent = Hand([Card("S", value) for value in "SENTJ"])
+        assert cent.declarations("C") == (100, 0)
+        two_tierces = Hand([Card("C", value) for value in "SENJQK"])
+        assert two_tierces.declarations("H") == (40, 0)
+        assert Hand([Card("C", "S"), Card("C", "N"), Card("C", "J")]).declarations("C") == (0, 0)
+
+    def test_carres_should_be_found(self):
+        jacks = Hand([Card(suit, "J") for suit in "CDHS"])
+        assert jacks.declarations("C") == (200, 0)
+        nines = Hand([Card(suit, "N") for suit in "CDHS"])
+        assert nines.declarations("C") == (150, 0)
+        sevens = Hand([Card(suit, "S") for suit in "CDHS"])
+        assert sevens.declarations("C") == (0, 0)
+
+    def test_best_declaration_should_compare_points_kind_then_rank(self):
+        tierce_to_ace = cards_to_mask([Card("S", value) for value in "QKA"])
+        tierce_to_nine = cards_to_mask([Card("H", value) for value in "SEN"])
+        carre = cards_to_mask([Card(suit, "A") for suit in "CDHS"])
+        cent = cards_to_mask([Card("D", value) for value in "SENTJ"])
+        assert best_declaration(tierce_to_ace) > best_declaration(tierce_to_nine | tierce_to_nine << 8)
+        assert best_declaration(carre) > best_declaration(cent)
+        assert best_declaration(0) == (0, 0, -1)
+
+    @staticmethod
+    def declare(hands):
+        players = [Player(name) for name in ("Alex", "Marie", "Thibaud", "Veltin")]
+        round = Round(0, Team(0, players[0], players[2]), Team(1, players[1], players[3]),
+                      Deck(), Distributor(), Referee())
+        for player, hand in zip(round.players, hands):
+            for card in hand:
+                player.add_card_to_hand(card)
+        round.set_trump_suit("C")
+        round.announce_declarations()
+        return {team.id: team.declaration_points for team in round.teams}
+
+    def test_team_with_the_best_declaration_should_keep_its_declarations(self):
+        two_tierces = [Card("H", value) for value in "SEN"] + [Card("D", value) for value in "SEN"]
+        higher_tierce = [Card("S", value) for value in "QKA"]
+        assert self.declare([two_tierces, higher_tierce, [], []]) == {0: 0, 1: 20}
+        cinquante = [Card("S", value) for value in "JQKA"]
+        assert self.declare([two_tierces, [], cinquante, []]) == {0: 90, 1: 0}
+
+    def test_tied_declarations_should_go_to_the_first_to_play(self):
+        first = [Card("H", value) for value in "JQK"]
+        second = [Card("D", value) for value in "JQK"]
+        assert self.declare([[], first, second, []]) == {0: 0, 1: 20}
+        assert self.declare([[], [], [], []]) == {0: 0, 1: 0}
+
+    def test_belote_should_need_king_and_queen_of_trump(self):
+        hand = Hand([Card("H", "K"), Card("H", "Q"), Card("S", "A")])
+        assert hand.declarations("H") == (0, 20)
+        assert hand.declarations("S") == (0, 0)
+
+    def test_failed_contract_should_give_declarations_to_defence(self):
+        taker = Team(0, Player(), Player())
+        defence = Team(1, Player(), Player())
+        taker.has_started(True)
+        taker.get_cards(Trick([Card("C", "J"), Card("C", "N")]).to_ranked("C"))
+        defence.get_cards(Trick([Card("D", "A"), Card("H", "A"), Card("S", "A")]).to_ranked("C"))
+        defence.won_last_turn = True
+        taker.set_declarations(50, 20)
+        points = Referee().count_round_points({taker, defence})
+        assert points[taker] == 34 + 70
+        assert points[defence] == 43
+        taker.set_declarations(0, 20)
+        defence.set_declarations(50, 0)
+        points = Referee().count_round_points({taker, defence})
+        assert points[taker] == 20
+        assert points[defence] == 162 + 50
+
+
 class TestGameCommentator:
     def setup_method(self, method):
         team1 = Team(0, Player("Alex"), Player("Thibaud"))
@@ -537,4 +747,968 @@ class TestTrumpCard:
     def test_trump_value_should_win_against_non_trump(self):
         assert Trump(Card("C", "E")).is_higher_than(NonTrump(Card("D", "S")))
         assert Trump(Card("C", "S")).is_higher_than(NonTrump(Card("H", "A")))
-        assert Trump(Card("C", "K")).is_higher_than(NonTrump(Card("S", "Q")))
\ No newline at end of file
+        assert Trump(Card("C", "K")).is_higher_than(NonTrump(Card("S", "Q")))
+
+
+class TestHandFeatures:
+    def test_features_should_be_read_from_the_mask(self):
+        hand = Hand([Card("H", "J"), Card("H", "N"), Card("H", "S"), Card("C", "A"),
+                     Card("C", "T"), Card("S", "A"), Card("D", "S"), Card("D", "E")])
+        row = dict(zip(FEATURES, hand_features(hand.mask, SUIT_INDEX["H"])))
+        assert (row["trumps"], row["trump_jack"], row["trump_nine"]) == (3, 1, 1)
+        assert (row["side_aces"], row["side_tens"]) == (2, 1)
+        assert (row["clubs"], row["diamonds"], row["hearts"], row["spades"]) == (2, 2, 3, 1)
+        assert row["masters"] == 2 + 2 + 1
+
+    def test_masters_should_account_for_played_cards(self):
+        hand = Hand([Card("C", "K"), Card("C", "Q")])
+        assert feature([hand_features(hand.mask, SUIT_INDEX["H"])], "masters") == [0]
+        played = cards_to_mask([Card("C", "A"), Card("C", "T")])
+        assert hand_features(hand.mask, SUIT_INDEX["H"], played)[-1] == 2
+
+    def test_batch_should_match_single_hands(self):
+        rng = random.Random(43)
+        masks = [cards_to_mask(rng.sample(list(Deck()), 8)) for _ in range(100)]
+        assert hand_features(masks, 1) == [hand_features(mask, 1) for mask in masks]
+
+
+class TestStatistics:
+    def test_running_statistic_should_match_direct_computation(self):
+        values = [3, 7, 7, 19, 24, 0, 162]
+        statistic = RunningStatistic()
+        for value in values:
+            statistic.add(value)
+        mean = sum(values) / len(values)
+        variance = sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+        assert statistic.count == len(values)
+        assert statistic.mean == pytest.approx(mean)
+        assert statistic.variance == pytest.approx(variance)
+        low, high = statistic.confidence_interval()
+        assert low < mean < high
+
+    def test_merged_statistics_should_equal_single_stream(self):
+        values = list(range(0, 162, 7))
+        full, left, right = RunningStatistic(), RunningStatistic(), RunningStatistic()
+        for i, value in enumerate(values):
+            full.add(value)
+            (left if i % 3 else right).add(value)
+        left.merge(right)
+        assert left.count == full.count
+        assert left.mean == pytest.approx(full.mean)
+        assert left.variance == pytest.approx(full.variance)
+        assert (left.minimum, left.maximum) == (full.minimum, full.maximum)
+
+    def test_histogram_should_count_values_in_bins(self):
+        histogram = Histogram(0, 100, 10)
+        for value in [-1, 0, 9, 10, 99, 100]:
+            histogram.add(value)
+        assert histogram.counts[0] == 2
+        assert histogram.counts[1] == 1
+        assert histogram.counts[9] == 1
+        assert (histogram.underflow, histogram.overflow) == (1, 1)
+        assert histogram.total == 6
+
+    def test_statistics_should_observe_game(self):
+        team1 = Team(0, Player("Alex"), Player("Thibaud"))
+        team2 = Team(1, Player("Marie"), Player("Veltin"))
+        statistics = Statistics()
+        game = Game(team1, team2, Distributor(), Referee(), verbosity=0,
+                    observers=[statistics])
+        game.play()
+        assert statistics.taker_points.count == game.number_of_games_played
+        assert statistics.game_lengths.count == 1
+        assert 0 <= statistics.contracts.success_rate() <= 1
+        snapshot = Statistics.from_dict(statistics.to_dict())
+        assert snapshot.to_dict() == statistics.to_dict()
+
+
+class TestSequentialMatch:
+    def test_sequential_test_should_stop_on_clear_results(self):
+        test = SequentialTest(delta=0.1, alpha=0.05, beta=0.05)
+        while test.decision is None:
+            test.add_result(1)
+        assert test.decision == 1
+        assert test.games_played < 20
+
+    def test_sequential_test_should_stay_undecided_on_balanced_results(self):
+        test = SequentialTest()
+        for _ in range(50):
+            test.add_result(1)
+            test.add_result(0)
+        assert test.decision is None
+
+    def test_match_should_stop_at_max_games_or_decision(self):
+        match = Match(None, None, max_games=5, seed=42)
+        test = match.play()
+        assert test.games_played == 5 or test.decision is not None
+
+    def test_ladder_should_conserve_total_rating(self):
+        def highest_card(player, cards, trick):
+            return max(cards, key=lambda card: card.points)
+
+        ladder = Ladder({"first": None, "highest": highest_card},
+                        max_games=4, seed=42)
+        standings = ladder.play_all()
+        assert len(standings) == 2
+        assert sum(rating for _, rating in standings) == pytest.approx(3000)
+        assert ladder.games_played == ladder.results[0].games_played
+
+
+class TestDuplicateMatch:
+    def test_same_strategies_should_have_no_difference(self):
+        result = DuplicateMatch(None, None, seed=42).play(5)
+        assert result.deals.count == 5
+        assert result.rounds.count == 10
+        assert result.deals.mean == 0
+        assert result.deals.variance == 0
+
+    def test_both_plays_of_a_deal_should_share_the_cards(self):
+        match = DuplicateMatch(None, None, seed=42)
+        deal = match.play_deal(0)
+        assert deal.points_a_first == deal.points_b_second
+        assert deal.points_b_first == deal.points_a_second
+
+    def test_duplicate_should_reduce_variance(self):
+        def highest_card(player, cards, trick):
+            return max(cards, key=lambda card: card.points)
+
+        result = DuplicateMatch(highest_card, None, seed=42).play(40)
+        assert result.variance_reduction > 1
+        assert "deals" in str(result)
+
+
+class TestSimulationCheckpoint:
+    def test_resumed_simulation_should_match_uninterrupted_one(self, tmp_path):
+        expected = Simulation(None, None, number_of_games=3, seed=42).run()
+
+        calls = []
+
+        def crashing_strategy(player, cards, trick):
+            calls.append(1)
+            if len(calls) == 200:
+                raise RuntimeError("crash")
+            return cards[0]
+
+        path = str(tmp_path / "checkpoint.json")
+        simulation = Simulation(crashing_strategy, None, number_of_games=3, seed=42,
+                                checkpoint_path=path, checkpoint_every=1)
+        with pytest.raises(RuntimeError):
+            simulation.run()
+        resumed = Simulation.resume(path, None, None).run()
+        assert resumed.to_dict() == expected.to_dict()
+        assert expected.games_played == 3
+        assert sum(expected.wins) + expected.draws == 3
+
+    def test_cached_shards_should_not_be_played_again(self, tmp_path):
+        expected = Simulation(None, None, number_of_games=3, seed=49).run()
+        calls = []
+
+        def counting_strategy(player, cards, trick):
+            calls.append(1)
+            return cards[0]
+
+        counting_strategy.identity = "counting_strategy"
+        cache = ShardCache(str(tmp_path / "shards"))
+        first = Simulation(counting_strategy, None, number_of_games=3, seed=49, cache=cache, shard_size=2).run()
+        played = len(calls)
+        second = Simulation(counting_strategy, None, number_of_games=3, seed=49, cache=cache, shard_size=2).run()
+        assert len(calls) == played > 0
+        assert (cache.hits, cache.misses) == (2, 2)
+        for simulation in (first, second):
+            assert simulation.wins == expected.wins and simulation.draws == expected.draws
+            assert simulation.statistics.taker_points.count == expected.statistics.taker_points.count
+            assert simulation.statistics.taker_points.mean == pytest.approx(expected.statistics.taker_points.mean)
+        counting_strategy.version = 2
+        Simulation(counting_strategy, None, number_of_games=3, seed=49, cache=cache, shard_size=2).run()
+        assert len(calls) == 2 * played
+
+    def test_shard_cache_should_evict_least_recently_used_shards(self, tmp_path):
+        cache = ShardCache(str(tmp_path), max_bytes=250)
+        keys = [cache.key({"games": [i, i + 1]}) for i in range(3)]
+        cache.put(keys[0], {"data": "x" * 100})
+        cache.put(keys[1], {"data": "y" * 100})
+        os.utime(cache.path(keys[0]), (0, 0))
+        cache.put(keys[2], {"data": "z" * 100})
+        assert cache.get(keys[0]) is None and cache.get(keys[1]) == {"data": "y" * 100}
+        assert cache.size() <= 250
+
+    def test_wrapped_strategies_should_be_identified_by_what_they_wrap(self):
+        assert shard_cache.identity(MemoizedStrategy(lowest_card)) == \
+            "players.strategy_cache.MemoizedStrategy(tests.lowest_card)"
+
+    def test_strategy_configurations_should_have_distinct_identities(self):
+        identity = shard_cache.identity
+        assert identity(ISMCTS(iterations=100)) != identity(ISMCTS(iterations=5000))
+        assert identity(TrumpStrengthPolicy(6)) != identity(TrumpStrengthPolicy(7))
+        assert identity(BiddingPolicy(bytes(cfr.NUMBER_OF_INFORMATION_SETS))) != \
+            identity(BiddingPolicy(bytes([255]) * cfr.NUMBER_OF_INFORMATION_SETS))
+        with pytest.raises(ValueError):
+            identity(lambda player, cards, trick: cards[0])
+
+    def test_checkpoint_should_leave_no_temporary_file(self, tmp_path):
+        path = str(tmp_path / "checkpoint.json")
+        Simulation(None, None, number_of_games=1, seed=1, checkpoint_path=path).run()
+        assert [p.name for p in tmp_path.iterdir()] == ["checkpoint.json"]
+
+
+class TestCardTracker:
+    def test_card_masks_should_round_trip(self):
+        deck = Deck()
+        assert cards_to_mask(deck.cards) == ALL_CARDS
+        assert mask_to_cards(card_mask(Card("H", "Q"))) == [Card("H", "Q")]
+        assert Hand([Card("C", "S"), Card("S", "A")]).mask == 1 | 1 << 31
+
+    def test_tracker_should_record_voids(self):
+        tracker = CardTracker("C")
+        trick = Trick()
+        trick.add_card(Card("D", "A"))
+        tracker.card_played(0, trick[-1], trick)
+        trick.add_card(Card("H", "S"))
+        tracker.card_played(1, trick[-1], trick)
+        assert tracker.is_void(1, "D")
+        assert tracker.is_void(1, "C")
+        assert not tracker.is_void(1, "H")
+        assert not tracker.is_void(0, "D")
+        assert all(not tracker.possible[seat] & card_mask(Card("D", "A"))
+                   for seat in range(4))
+
+    def test_tracker_should_give_revealed_card_to_taker(self):
+        tracker = CardTracker()
+        tracker.card_revealed(2, Card("S", "J"))
+        assert tracker.known[2] == card_mask(Card("S", "J"))
+        assert tracker.possible[2] & card_mask(Card("S", "J"))
+        assert not tracker.possible[0] & card_mask(Card("S", "J"))
+
+    def test_players_hands_should_stay_possible_during_round(self):
+        team1 = Team(0, Player("Alex"), Player("Thibaud"))
+        team2 = Team(1, Player("Marie"), Player("Veltin"))
+        round = Round(0, team1, team2, Deck(), Distributor(), Referee(), seed=36)
+        round.distribute_cards_and_choose_trump()
+        for _ in range(8):
+            round.play_one_turn()
+            for player in round.players:
+                assert player.hand.mask & ~round.tracker.possible[player.seat] == 0
+                other = round.players[(player.seat + 1) % 4]
+                assert player.possible_cards(other.seat) & player.hand.mask == 0
+        assert round.tracker.played == ALL_CARDS
+
+
+class TestDealSampler:
+    def test_sampler_should_respect_constraints(self):
+        clubs, diamonds = 0xFF, 0xFF << 8
+        possible = [0, clubs | diamonds, diamonds, clubs | diamonds]
+        sampler = DealSampler(possible, [0, 6, 4, 6], seed=1)
+        for hands in sampler.sample(200):
+            assert hands[0] == 0
+            assert [bin(hand).count("1") for hand in hands] == [0, 6, 4, 6]
+            assert hands[2] & ~diamonds == 0
+            assert hands[1] | hands[2] | hands[3] == clubs | diamonds
+
+    def test_sampler_should_be_uniform(self):
+        possible = [0, 0b1111, 0b0111, 0b1111]
+        sampler = DealSampler(possible, [0, 1, 1, 2], seed=3)
+        # seat 2 never holds the fourth card: 3 * 3 deals
+        assert sampler.count() == 9
+        frequencies = {}
+        for hands in sampler.sample(9000):
+            frequencies[hands] = frequencies.get(hands, 0) + 1
+        assert len(frequencies) == 9
+        assert all(800 < frequency < 1200 for frequency in frequencies.values())
+
+    def test_sampler_should_reject_impossible_constraints(self):
+        with pytest.raises(ValueError):
+            DealSampler([0, 0b11, 0b11, 0], [0, 2, 1, 0])
+
+    def test_sampler_from_player_should_contain_actual_deal(self):
+        team1 = Team(0, Player("Alex"), Player("Thibaud"))
+        team2 = Team(1, Player("Marie"), Player("Veltin"))
+        round = Round(0, team1, team2, Deck(), Distributor(), Referee(), seed=36)
+        round.distribute_cards_and_choose_trump()
+        for _ in range(5):
+            round.play_one_turn()
+        player = round.players[0]
+        sampler = DealSampler.from_player(player, seed=0)
+        for hands in sampler.sample(50):
+            assert hands[0] == player.hand.mask
+            for seat, other in enumerate(round.players):
+                assert bin(hands[seat]).count("1") == len(other.hand)
+                assert hands[seat] & ~round.tracker.possible[seat] == 0
+
+
+class TestSuitDistribution:
+    @staticmethod
+    def player_with_void():
+        player = Player()
+        for card in mask_to_cards(0xFF):
+            player.add_card_to_hand(card)
+        player.join_round(0, CardTracker("H"))
+        player.tracker.set_void(1, "D")
+        return player
+
+    def test_tables_should_be_hypergeometric(self):
+        assert distribution.marginal(2, 8, 16)[1] == pytest.approx(64 / 120)
+        for unseen, size, total in [(3, 8, 24), (5, 4, 9), (0, 3, 3)]:
+            assert sum(distribution.marginal(unseen, size, total)) == pytest.approx(1)
+        splits = distribution.splits(3, (1, 2, 3), (0, 8, 8, 8))
+        assert sum(splits.values()) == pytest.approx(1)
+        assert sum(probability for split, probability in splits.items() if split[0] == 1) == \
+            pytest.approx(distribution.marginal(3, 8, 24)[1])
+        assert distribution.marginals([(2, 8, 16), (3, 8, 24)]) == \
+            [distribution.marginal(2, 8, 16), distribution.marginal(3, 8, 24)]
+
+    def test_voids_should_be_taken_into_account(self):
+        player = self.player_with_void()
+        suits = SuitDistribution(player)
+        diamonds = SUIT_INDEX["D"]
+        assert suits.count_probabilities(diamonds, 1) == [1.] + [0.] * 8
+        assert suits.split_probability(diamonds, {2: 4, 3: 4}) == pytest.approx(distribution.marginal(8, 8, 16)[4])
+        assert suits.card_probability(card_index(Card("D", "A")), 2) == pytest.approx(0.5)
+        assert suits.card_probability(card_index(Card("S", "A")), 1) == pytest.approx(0.5)
+        assert suits.card_probability(card_index(Card("C", "A")), 1) == 0
+
+    def test_probabilities_should_match_sampled_deals(self):
+        player = self.player_with_void()
+        suits = SuitDistribution(player)
+        sampler = DealSampler.from_player(player, seed=45)
+        deals = sampler.sample(2000)
+        hearts = SUIT_INDEX["H"]
+        for k, probability in enumerate(suits.count_probabilities(hearts, 2)):
+            frequency = sum(1 for hands in deals if bin(hands[2] & 0xFF << 16).count("1") == k) / len(deals)
+            assert abs(frequency - probability) < 0.05
+
+
+class TestISMCTS:
+    def setup_method(self, method):
+        self.strategy = ISMCTS(iterations=50, seed=0)
+        team1 = Team(0, Player("Alex", playing_strategy=self.strategy), Player("Thibaud"))
+        team2 = Team(1, Player("Marie"), Player("Veltin"))
+        self.round = Round(0, team1, team2, Deck(), Distributor(), Referee(), seed=36)
+        self.player = team1.player1
+
+    def test_game_state_should_follow_player_rules(self):
+        hands = [cards_to_mask([Card("C", "A"), Card("D", "S")]),
+                 cards_to_mask([Card("H", "A"), Card("S", "S")]),
+                 cards_to_mask([Card("C", "S"), Card("D", "E")]),
+                 cards_to_mask([Card("D", "A"), Card("H", "S")])]
+        state = GameState(hands, trump=3, leader=0)
+        state.play(card_index(Card("C", "A")))
+        assert state.legal_moves() == [card_index(Card("S", "S"))]
+        for _ in range(3):
+            state.play(state.legal_moves()[0])
+        assert state.leader == 1
+        assert state.points == [0, 22]
+        while not state.is_over:
+            state.play(state.legal_moves()[0])
+        assert state.points == [0, 22 + 11 + 10]
+
+    def test_ismcts_player_should_play_a_full_round(self):
+        self.round.distribute_cards_and_choose_trump()
+        self.round.play()
+        self.round.count_points()
+        declared = sum(team.declaration_points + team.belote_points for team in self.round.teams)
+        assert sum(team.current_game_points for team in self.round.teams) == 162 + declared
+
+    def test_ismcts_should_reuse_its_tree_between_tricks(self):
+        self.strategy.iterations = 2000
+        self.round.distribute_cards_and_choose_trump()
+        self.round.play_one_turn()
+        tree, _, first_root, _ = self.strategy.searches[self.player]
+        size = tree.size
+        self.round.play_one_turn()
+        tree, _, second_root, _ = self.strategy.searches[self.player]
+        assert 0 < second_root < size
+        assert tree.parent[second_root] != -1
+
+    def test_ismcts_should_drop_the_trees_of_dropped_players(self):
+        player = Player("Alex", playing_strategy=self.strategy)
+        team2 = Team(1, Player("Marie"), Player("Veltin"))
+        round = Round(1, Team(0, player, Player("Thibaud")), team2, Deck(), Distributor(), Referee(), seed=32)
+        round.distribute_cards_and_choose_trump()
+        round.play_one_turn()
+        assert len(self.strategy.searches) == 1
+        del round, player
+        gc.collect()
+        assert len(self.strategy.searches) == 0
+
+    def test_pondering_player_should_play_a_full_round(self):
+        self.strategy.pondering = True
+        self.round.distribute_cards_and_choose_trump()
+        self.round.play()
+        self.round.count_points()
+        self.round.close()
+        assert self.strategy.ponderings == {}
+        assert sum(team.current_game_points for team in self.round.teams) >= 162
+
+    def test_decision_should_reuse_pondered_iterations(self):
+        self.strategy.pondering = True
+        for player in self.round.players:
+            player.playing_strategy = self.strategy
+        self.round.distribute_cards_and_choose_trump()
+        leader = self.round.who_plays_now(0)
+        leader.ponder(Trick(trump_suit=self.round.trump_suit), leader.seat)
+        thread, _ = self.strategy.ponderings[leader]
+        thread.join(timeout=30)
+        tree, _, root, _ = self.strategy.searches[leader]
+        assert tree.visits[root] >= 50
+        iterations = []
+        iterate = self.strategy.iterate
+        self.strategy.iterate = lambda *arguments: iterations.append(1) or iterate(*arguments)
+        card = self.strategy(leader, list(leader.hand), Trick(trump_suit=self.round.trump_suit))
+        assert card in leader.hand and iterations == []
+        assert self.strategy.ponderings == {}
+
+    def test_pondering_should_not_draw_from_the_strategy_generator(self):
+        self.strategy.pondering = True
+        self.round.distribute_cards_and_choose_trump()
+        state = self.strategy.random.getstate()
+        self.player.ponder(Trick(trump_suit=self.round.trump_suit), self.round.who_plays_now(0).seat)
+        drawn = self.strategy.random.getstate()
+        self.strategy.ponderings[self.player][0].join(timeout=30)
+        assert self.strategy.random.getstate() == drawn != state
+
+    def test_pondering_should_be_part_of_the_strategy_identity(self):
+        assert shard_cache.identity(ISMCTS(iterations=50, pondering=True)) != \
+            shard_cache.identity(ISMCTS(iterations=50))
+
+    def test_tree_filled_by_pondering_should_be_reused(self):
+        strategy = ISMCTS(iterations=100000, capacity=300, seed=0, pondering=True)
+        for player in self.round.players:
+            player.playing_strategy = strategy
+        self.round.distribute_cards_and_choose_trump()
+        leader = self.round.who_plays_now(0)
+        leader.ponder(Trick(trump_suit=self.round.trump_suit), leader.seat)
+        strategy.ponderings[leader][0].join(timeout=30)
+        tree, _, root, _ = strategy.searches[leader]
+        assert tree.is_full
+        visits = tree.visits[root]
+        strategy.iterations = visits + 10
+        strategy(leader, list(leader.hand), Trick(trump_suit=self.round.trump_suit))
+        tree, _, second_root, _ = strategy.searches[leader]
+        assert second_root == root and tree.is_full and tree.visits[root] == visits + 10
+
+
+class TestSolverAndTablebase:
+    def setup_method(self, method):
+        rng = random.Random(7)
+        self.positions = []
+        for _ in range(12):
+            cards = rng.sample(range(32), 8)
+            hands = tuple(sum(1 << card for card in cards[2 * i:2 * i + 2]) for i in range(4))
+            self.positions.append((hands, rng.randrange(4), rng.randrange(4)))
+
+    def test_solver_should_match_exhaustive_minimax(self):
+        def minimax(state):
+            if state.is_over:
+                return state.points[0]
+            values = []
+            for move in state.legal_moves():
+                child = state.copy()
+                child.play(move)
+                values.append(minimax(child))
+            return max(values) if state.player_to_move % 2 == 0 else min(values)
+
+        for hands, leader, trump in self.positions:
+            state = GameState(hands, trump, leader)
+            assert Solver().solve(state) == minimax(state)
+
+    def test_tablebase_lookups_should_match_solver(self, tmp_path):
+        path = str(tmp_path / "endgames.tb")
+        assert tablebase.generate(path, self.positions, processes=2) == len(self.positions)
+        with Tablebase(path) as table:
+            assert table.tricks == 2
+            for hands, leader, trump in self.positions:
+                state = GameState(hands, trump, leader)
+                assert table.lookup_state(state) == Solver().solve(state)
+            assert table.lookup((1, 2, 4, 8), 0, 0) is None
+
+    def test_solver_should_use_tablebase_at_endgame_boundary(self, tmp_path):
+        path = str(tmp_path / "endgames.tb")
+        rng = random.Random(3)
+        cards = rng.sample(range(32), 12)
+        hands = [sum(1 << card for card in cards[3 * i:3 * i + 3]) for i in range(4)]
+        state = GameState(hands, 1, 0)
+        endgames = []
+        for move in state.legal_moves():
+            child = state.copy()
+            child.play(move)
+            endgames.extend(reachable_boundaries(child))
+        tablebase.generate(path, endgames, processes=1)
+        with Tablebase(path) as table:
+            solver = Solver(tablebase=table)
+            assert solver.solve(state) == Solver().solve(state)
+            assert len(solver.table) == 1
+
+
+def reachable_boundaries(state):
+    """Positions at the next trick boundary reachable from state"""
+    if not state.trick:
+        return [(tuple(state.hands), state.leader, state.trump)]
+    positions = []
+    for move in state.legal_moves():
+        child = state.copy()
+        child.play(move)
+        positions.extend(reachable_boundaries(child))
+    return positions
+
+
+class TestParallelSearch:
+    def test_shared_table_should_store_bounds(self):
+        table = SharedTranspositionTable(capacity=64)
+        try:
+            key = ((1, 2, 4, 8), 0, 0)
+            assert table.get(key) is None
+            table.put(key, -3, 40)
+            assert table.get(key) == (-3, 40)
+            assert table.get(((1, 2, 4, 16), 0, 0)) is None
+        finally:
+            table.close()
+            table.unlink()
+
+    def test_parallel_evaluation_should_match_solver(self):
+        rng = random.Random(8)
+        cards = rng.sample(range(32), 16)
+        hands = [sum(1 << card for card in cards[4 * i:4 * i + 4]) for i in range(4)]
+        state = GameState(hands, 2, 1)
+        expected = Solver().evaluate_moves(state)
+        with ParallelSearch(processes=2, capacity=1 << 12) as search:
+            assert search.evaluate_moves(state) == expected
+            assert search.evaluate_deals([state, state]) == expected
+
+
+def produce_experience(name, lock, seed):
+    buffer = ExperienceBuffer.attach(name, lock)
+    recorder = ExperienceRecorder(None, buffer)
+    team1 = Team(0, Player("Alex", playing_strategy=recorder), Player("Thibaud"))
+    team2 = Team(1, Player("Marie"), Player("Veltin"))
+    game = Game(team1, team2, Distributor(), Referee(), verbosity=0,
+                observers=[recorder], seed=seed)
+    game.play_round()
+    buffer.close()
+
+
+class TestExperienceBuffer:
+    def test_buffer_should_overwrite_oldest_records(self):
+        buffer = ExperienceBuffer(capacity=3, state_size=2)
+        try:
+            assert buffer.sample(4) == [] and buffer.records_sampled == 0
+            for action in range(5):
+                buffer.add([action, -action], 1 << action, action, action / 10)
+            assert len(buffer) == 3
+            assert buffer.records_written == 5
+            assert buffer.records_overwritten == 2
+            assert sorted(buffer[slot].action for slot in range(3)) == [2, 3, 4]
+            record = buffer[0]
+            assert list(record.state) == [3., -3.]
+            assert record.legal_mask == 1 << 3
+            assert record.value == pytest.approx(0.3)
+            del record
+        finally:
+            buffer.close()
+            buffer.unlink()
+
+    def test_producers_should_fill_buffer_from_games(self):
+        buffer = ExperienceBuffer(capacity=64)
+        try:
+            producers = [multiprocessing.Process(target=produce_experience,
+                                                 args=(buffer.name, buffer.lock, seed))
+                         for seed in range(2)]
+            for producer in producers:
+                producer.start()
+            for producer in producers:
+                producer.join()
+            assert buffer.records_written == 16
+            batch = buffer.sample(8)
+            assert buffer.records_sampled == 8
+            for record in batch:
+                assert record.legal_mask >> record.action & 1
+                assert 0 <= record.value <= 1
+                assert sum(record.state[:32]) >= 1
+            del batch, record
+        finally:
+            buffer.close()
+            buffer.unlink()
+
+
+class TestBiddingSimulator:
+    def test_deal_should_match_round_with_same_seed(self):
+        team1 = Team(0, Player("Alex"), Player("Thibaud"))
+        team2 = Team(1, Player("Marie"), Player("Veltin"))
+        round = Round(0, team1, team2, Deck(), Distributor(), Referee(), seed="7:3")
+        revealed_card = round.perform_first_distribution_and_reveal_card()
+        hands, revealed, remaining = bidding.deal("7:3")
+        assert [player.hand.mask for player in round.players] == hands
+        assert revealed == card_index(revealed_card)
+        round.first_round_calls(revealed_card)
+        round.distributor.distribute_remaining_cards_to_players(round.deck, round.players)
+        taker = round.players.index(round.taker)
+        assert [player.hand.mask for player in round.players] == \
+            bidding.complete_hands(hands, revealed, remaining, taker)
+
+    def test_always_take_policy_should_give_contract_to_first_seat(self):
+        simulator = BiddingSimulator().run(200)
+        assert simulator.deals == 200
+        assert simulator.passed == 0
+        taken = {}
+        for statistics in simulator.classes.values():
+            for key, n in statistics.taken.items():
+                taken[key] = taken.get(key, 0) + n
+        assert set(seat for seat, calling_round, trump in taken) == {0}
+        assert sum(taken.values()) == 200
+        assert sum(s.offered for s in simulator.classes.values()) == 800
+
+    def test_evaluator_should_score_taken_contracts(self):
+        simulator = BiddingSimulator(TrumpStrengthPolicy(threshold=5),
+                                     bidding.playout_evaluator(playouts=2, seed=0))
+        simulator.run(100, seed=1)
+        values = [s.values for s in simulator.classes.values() if s.values.count]
+        assert sum(v.count for v in values) == 100 - simulator.passed
+        assert all(0 <= v.minimum and v.maximum <= 162 for v in values)
+
+
+def jack_evaluator(contract):
+    """The taker's team makes its contract only with the jack of trump"""
+    hand = contract.hands[contract.taker]
+    return 120 if hand >> (8 * contract.trump + VALUE_INDEX["J"]) & 1 else 40
+
+
+class TestBiddingSolver:
+    def test_solver_should_learn_to_take_with_the_jack(self):
+        solver = BiddingSolver(evaluator=jack_evaluator, seed=44).add_deals(300)
+        policy = solver.solve(100)
+        strategy = solver.average_strategy()
+        for hand_bucket in range(cfr.NUMBER_OF_BUCKETS):
+            i = cfr.information_set(1, 0, hand_bucket)
+            if solver.weight_sums[i] > 0:
+                jack = hand_bucket // 6 % 2
+                assert (strategy[i] > 0.9) if jack else (strategy[i] < 0.1)
+        assert len(policy.table) == cfr.NUMBER_OF_INFORMATION_SETS
+
+    def test_policy_should_be_saved_and_loaded(self, tmp_path):
+        policy = BiddingSolver(evaluator=jack_evaluator).add_deals(50).solve(10)
+        policy.save(str(tmp_path / "policy"))
+        assert BiddingPolicy.load(str(tmp_path / "policy")).table == policy.table
+        assert not policy.stochastic and BiddingPolicy(policy.table, random.Random(0)).stochastic
+
+    def test_players_should_call_with_the_policy(self):
+        policy = BiddingSolver(evaluator=jack_evaluator).add_deals(200).solve(50)
+        players = [Player(name, starting_strategy=policy) for name in ("Alex", "Thibaud", "Marie", "Veltin")]
+        game = Game(Team(0, players[0], players[1]), Team(1, players[2], players[3]),
+                    Distributor(), Referee(), verbosity=0, observers=[Statistics()], seed=44)
+        for _ in range(10):
+            game.play_round()
+        statistics = game.observers[0]
+        assert statistics.rounds_not_played + statistics.taker_points.count == 10
+        for player in players:
+            assert len(player.hand) == 0
+
+    def test_rounds_where_everyone_passes_should_not_be_played(self):
+        players = [Player(name, starting_strategy=lambda player, card: False)
+                   for name in ("Alex", "Thibaud", "Marie", "Veltin")]
+        statistics = Statistics()
+        game = Game(Team(0, players[0], players[1]), Team(1, players[2], players[3]),
+                    Distributor(), Referee(), verbosity=0, observers=[statistics], seed=44)
+        for _ in range(2):
+            game.play_round()
+        assert statistics.rounds_not_played == 2
+        assert all(len(player.hand) == 0 for player in players)
+
+
+def lowest_card(player, cards, trick):
+    return min(cards, key=card_index)
+
+
+def highest_card(player, cards, trick):
+    return max(cards, key=card_index)
+
+
+class CountingStrategy:
+    def __init__(self, strategy, stochastic=False):
+        self.strategy = strategy
+        self.stochastic = stochastic
+        self.calls = 0
+
+    def __call__(self, *arguments):
+        self.calls += 1
+        return self.strategy(*arguments)
+
+
+class TestMemoizedStrategy:
+    @staticmethod
+    def player_with(cards, strategy):
+        player = Player(playing_strategy=strategy)
+        for card in cards:
+            player.add_card_to_hand(card)
+        player.set_trump_suit("H")
+        return player
+
+    def test_same_information_set_should_hit_the_cache(self):
+        strategy = CountingStrategy(lowest_card)
+        memoized = MemoizedStrategy(strategy)
+        cards = [Card("C", "A"), Card("D", "S"), Card("S", "T")]
+        first = self.player_with(cards, memoized)
+        second = self.player_with(cards, memoized)
+        assert first.choose_card(Trick(), "H") == Card("C", "A")
+        chosen = second.choose_card(Trick(), "H")
+        assert chosen == Card("C", "A") and chosen.owner is second
+        assert (memoized.hits, memoized.misses, strategy.calls) == (1, 1, 1)
+
+    def test_different_information_sets_should_not_share_entries(self):
+        memoized = MemoizedStrategy(lowest_card)
+        cards = [Card("C", "A"), Card("D", "S")]
+        players = [self.player_with(cards, memoized) for _ in range(3)]
+        trackers = [CardTracker("H") for _ in range(3)]
+        for seat, (player, tracker) in enumerate(zip(players, trackers)):
+            player.join_round(seat % 2, tracker)
+        for tracker, seat in ((trackers[0], 2), (trackers[1], 3), (trackers[2], 3)):
+            trick = Trick()
+            trick.add_card(Card("S", "A"))
+            tracker.card_played(seat, trick[-1], trick)
+        keys = {playing_key(player, cards, Trick()) for player in players}
+        assert len(keys) == 3
+
+    def test_starting_decisions_should_depend_on_the_seat(self):
+        policy = BiddingPolicy.from_probabilities(
+            [1. if i // cfr.NUMBER_OF_BUCKETS == 0 else 0. for i in range(cfr.NUMBER_OF_INFORMATION_SETS)])
+        memoized = MemoizedStrategy(policy, key=starting_key)
+        cards = [Card("C", "A"), Card("D", "S"), Card("S", "T"), Card("H", "K"), Card("H", "E")]
+        players = [self.player_with(cards, memoized) for _ in range(2)]
+        for seat, player in enumerate(players):
+            player.join_round(seat, CardTracker())
+        revealed = Card("H", "J")
+        assert [memoized(player, revealed) for player in players] == \
+            [policy(player, revealed) for player in players] == [True, False]
+
+    def test_least_recently_used_entry_should_be_evicted(self):
+        memoized = MemoizedStrategy(lowest_card, capacity=1)
+        first = self.player_with([Card("C", "A")], memoized)
+        second = self.player_with([Card("D", "A")], memoized)
+        first.choose_card(Trick(), "H")
+        second.choose_card(Trick(), "H")
+        first.choose_card(Trick(), "H")
+        assert (memoized.hits, memoized.misses, memoized.evictions) == (0, 3, 2)
+        assert len(memoized) == 1
+
+    def test_stochastic_strategy_should_bypass_the_cache(self):
+        strategy = CountingStrategy(lowest_card, stochastic=True)
+        memoized = MemoizedStrategy(strategy)
+        player = self.player_with([Card("C", "A"), Card("D", "S")], memoized)
+        player.choose_card(Trick(), "H")
+        player.choose_card(Trick(), "H")
+        assert strategy.calls == 2 and len(memoized) == 0
+
+    def test_memoized_strategy_should_not_change_the_round(self):
+        def play(strategy):
+            players = [Player(name, playing_strategy=strategy)
+                       for name in ("Alex", "Thibaud", "Marie", "Veltin")]
+            round = Round(0, Team(0, players[0], players[1]), Team(1, players[2], players[3]),
+                          Deck(), Distributor(), Referee(), seed=36)
+            round.distribute_cards_and_choose_trump()
+            round.play()
+            return round.tracker.history
+
+        assert play(MemoizedStrategy(lowest_card)) == play(lowest_card)
+
+
+class TestRoundAnalysis:
+    @staticmethod
+    def record_game(path, rounds=3):
+        recorder = RoundRecorder(str(path))
+        game = Game(Team(0, Player("Alex"), Player("Thibaud")), Team(1, Player("Marie"), Player("Veltin")),
+                    Distributor(), Referee(), verbosity=0, observers=[recorder], seed=40)
+        for _ in range(rounds):
+            game.play_round()
+        recorder.close()
+        return list(read_records(str(path)))
+
+    def test_records_should_replay_the_rounds(self, tmp_path):
+        records = self.record_game(tmp_path / "rounds.jsonl")
+        assert len(records) == 3
+        for record in records:
+            assert sum(bin(hand).count("1") for hand in record["hands"]) == 32
+            states = list(analysis.decision_points(record))
+            assert len(states) == 32
+
+    def test_analysis_should_annotate_every_play(self, tmp_path):
+        records = self.record_game(tmp_path / "rounds.jsonl")
+        analysed, total_regret = analysis.analyse(str(tmp_path / "rounds.jsonl"),
+                                                  str(tmp_path / "annotated.jsonl"),
+                                                  processes=2, max_tricks=3)
+        annotated = list(read_records(str(tmp_path / "annotated.jsonl")))
+        assert [record["plays"] for record in annotated] == [record["plays"] for record in records]
+        decisions = [decision for record in annotated for decision in record["decisions"]]
+        assert len(decisions) == 96
+        assert all(decision is None for record in annotated for decision in record["decisions"][:20])
+        assert all(decision is None for record in annotated for decision in record["decisions"][-4:])
+        analysed_decisions = [decision for decision in decisions if decision is not None]
+        assert len(analysed_decisions) == analysed > 0
+        assert all(decision["regret"] >= 0 for decision in analysed_decisions)
+        assert total_regret == sum(decision["regret"] for decision in analysed_decisions)
+
+    def test_sampled_values_should_use_the_player_information(self, tmp_path):
+        record = self.record_game(tmp_path / "rounds.jsonl", rounds=1)[0]
+        decisions = analysis.analyse_round((record, 4, 2, 0))
+        assert any(decision is not None for decision in decisions)
+        assert all(decision["regret"] >= 0 for decision in decisions if decision is not None)
+
+
+class TestWatchdog:
+    @staticmethod
+    def play_watched_game(directory, seed=46, **thresholds):
+        dog = watchdog.Watchdog(str(directory), **thresholds)
+        strategies = (lowest_card, MemoizedStrategy(lowest_card), highest_card, lowest_card)
+        players = [dog.watch(Player(name, playing_strategy=strategy))
+                   for name, strategy in zip(("Alex", "Thibaud", "Marie", "Veltin"), strategies)]
+        game = Game(Team(0, players[0], players[1]), Team(1, players[2], players[3]),
+                    Distributor(), Referee(), verbosity=0, observers=[dog], seed=seed)
+        for _ in range(3):
+            game.play_round()
+        return dog
+
+    def test_fast_rounds_should_not_be_captured(self, tmp_path):
+        dog = self.play_watched_game(tmp_path, round_threshold=60, decision_threshold=60)
+        assert dog.captures == [] and len(dog.decisions) == 32
+
+    def test_slow_rounds_should_be_captured_and_replayed(self, tmp_path):
+        dog = self.play_watched_game(tmp_path, round_threshold=0, profile=True)
+        assert len(dog.captures) == 3
+        for path in dog.captures:
+            assert os.path.exists(path[:-len(".json")] + ".prof")
+            round, identical = watchdog.replay(path, profile_path=str(tmp_path / "replay.prof"))
+            assert identical and round.played
+        _, identical = watchdog.replay(dog.captures[0], playing_strategy=lowest_card)
+        assert not identical
+
+    def test_unseeded_rounds_should_be_replayed_from_their_deal(self, tmp_path):
+        dog = self.play_watched_game(tmp_path, seed=None, round_threshold=0)
+        assert len(set(dog.captures)) == 3
+        assert all(watchdog.replay(path)[1] for path in dog.captures)
+        strategy = watchdog.load_strategy(watchdog.describe_strategy(MemoizedStrategy(lowest_card, capacity=7)))
+        assert isinstance(strategy, MemoizedStrategy) and strategy.capacity == 7
+        assert strategy.strategy is lowest_card
+
+    def test_seats_with_bidding_policies_should_be_replayed(self, tmp_path):
+        policy = BiddingPolicy.from_probabilities([0.6] * cfr.NUMBER_OF_INFORMATION_SETS)
+        rebuilt = watchdog.load_strategy(watchdog.describe_strategy(policy))
+        assert rebuilt.table == policy.table and not rebuilt.stochastic
+        memoized = watchdog.load_strategy(watchdog.describe_strategy(MemoizedStrategy(policy, key=starting_key)))
+        assert memoized.key is starting_key and memoized.strategy.table == policy.table
+        dog = watchdog.Watchdog(str(tmp_path), round_threshold=0)
+        playing = (lowest_card, lambda player, cards, trick: cards[0], lowest_card, lowest_card)
+        players = [dog.watch(Player(name, starting_strategy=policy, playing_strategy=strategy))
+                   for name, strategy in zip(("Alex", "Thibaud", "Marie", "Veltin"), playing)]
+        game = Game(Team(0, players[0], players[1]), Team(1, players[2], players[3]),
+                    Distributor(), Referee(), verbosity=0, observers=[dog], seed=46)
+        game.play_round()
+        with pytest.warns(UserWarning, match="default playing strategy"):
+            round, _ = watchdog.replay(dog.captures[0])
+        assert round.played and all(len(player.hand) == 0 for player in round.players)
+        round, _ = watchdog.replay(dog.captures[0], playing_strategy=lowest_card)
+        assert round.played
+
+
+class TestMemoryReport:
+    def test_deep_size_should_count_shared_objects_once(self):
+        shared = list(range(100))
+        seen = set()
+        size, number_of_objects = memory.deep_size([[shared], [shared]], seen)
+        assert memory.deep_size([shared], seen) == (0, 0)
+        assert number_of_objects >= 103
+
+    def test_monitor_should_attribute_memory_to_components(self):
+        monitor = memory.MemoryMonitor(trace=True)
+        strategy = MemoizedStrategy(lowest_card)
+        players = [Player(name, playing_strategy=strategy) for name in ("Alex", "Thibaud", "Marie", "Veltin")]
+        game = Game(Team(0, players[0], players[1]), Team(1, players[2], players[3]),
+                    Distributor(), Referee(), verbosity=0, observers=[monitor], seed=47)
+        try:
+            for _ in range(4):
+                game.play_round()
+        finally:
+            monitor.stop()
+        assert len(monitor.reports) == 4
+        components = monitor.reports[-1]["components"]
+        assert set(components) == set(memory.COMPONENTS)
+        assert components["cards"][1] >= 32
+        assert components["caches"][0] > 0 and components["strategies"][0] > 0
+        assert monitor.growth()["caches"] > 0
+        assert monitor.reports[-1]["peak"] >= monitor.reports[-1]["traced"] > 0
+
+    def test_monitor_should_not_stop_tracing_it_did_not_start(self):
+        tracemalloc.start()
+        try:
+            memory.MemoryMonitor(trace=True).stop()
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+        monitor = memory.MemoryMonitor(trace=True)
+        monitor.stop()
+        assert not tracemalloc.is_tracing()
+
+
+class TestOpponentStore:
+    def test_profile_should_include_pending_and_written_counts(self, tmp_path):
+        path = str(tmp_path / "opponents.sqlite")
+        store = OpponentStore(path, flush_interval=60)
+        store.add("Alex", "offered", "1:3,1,0,1")
+        store.add("Alex", "taken", "1:3,1,0,1")
+        assert store.profile("Alex").take_rate("1:3,1,0,1") == 1.
+        assert store.flush(timeout=5)
+        profile = store.profile("Alex")
+        store.add("Alex", "offered", "1:3,1,0,1")
+        assert store.profile("Alex").take_rate("1:3,1,0,1") == 0.5
+        assert profile.take_rate("1:3,1,0,1") == 1.
+        store.close()
+        assert store.batches_written == 2
+        store = OpponentStore(path)
+        try:
+            profile = store.profile("Alex")
+            assert profile.count("offered", "1:3,1,0,1") == 2 and profile.count("taken", "1:3,1,0,1") == 1
+            assert store.profile("Marie").counts == {}
+        finally:
+            store.close()
+
+    def test_observer_should_record_calls_and_plays(self, tmp_path):
+        store = OpponentStore(str(tmp_path / "opponents.sqlite"), flush_interval=.01)
+        players = [Player(name) for name in ("Alex", "Thibaud", "Marie", "Veltin")]
+        game = Game(Team(0, players[0], players[1]), Team(1, players[2], players[3]),
+                    Distributor(), Referee(), verbosity=0, observers=[OpponentObserver(store)])
+        try:
+            for _ in range(3):
+                game.play_round()
+            profiles = [store.profile(player.name) for player in players]
+            offered = sum(count for profile in profiles
+                          for (statistic, _), count in profile.counts.items() if statistic == "offered")
+            taken = sum(count for profile in profiles
+                        for (statistic, _), count in profile.counts.items() if statistic == "taken")
+            assert 3 <= offered <= 24 and taken == 3
+            assert sum(sum(profile.leads().values()) for profile in profiles) == 24
+        finally:
+            store.close()
+
+    def test_second_round_calls_should_be_classed_for_the_suit_named(self, tmp_path):
+        def passes(player, card):
+            return False
+
+        def names_a_suit(player, card):
+            suit = max((suit for suit in "CDHS" if suit != card.suit),
+                       key=lambda suit: sum(card.suit == suit for card in player.hand))
+            return suit if player.seat == 1 else None
+
+        passes.announce = names_a_suit
+        store = OpponentStore(str(tmp_path / "opponents.sqlite"), flush_interval=.01)
+        players = [Player(name, starting_strategy=passes) for name in ("Alex", "Thibaud", "Marie", "Veltin")]
+        game = Game(Team(0, players[0], players[1]), Team(1, players[2], players[3]),
+                    Distributor(), Referee(), verbosity=0, observers=[OpponentObserver(store)], seed=48)
+        try:
+            game.play_round()
+            round_taker = [player for player in players if player.seat == 1][0]
+            profile = store.profile(round_taker.name)
+            (taken, count), = [((statistic, key), count) for (statistic, key), count in profile.counts.items()
+                               if statistic == "taken"]
+            assert taken[1].startswith("2:") and count == 1
+            assert int(taken[1][2:].split(",")[0]) >= 1
+            offered = sum(count for player in players for (statistic, _), count
+                          in store.profile(player.name).counts.items() if statistic == "offered")
+            assert offered == 6
+        finally:
+            store.close()